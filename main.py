@@ -1,38 +1,31 @@
 # Third-Party
 import uvicorn
-import asyncio
 
 # Local
-from src.settings.base import logger, AIOREDIS, app
-from src.apps.views.users import reg, login_logout
-from src.apps.views.genres import genres
-from src.apps.views.authors import authors
-from src.apps.views.books import books
-from src.apps.views.reserv import reserv
+from src.settings.base import logger
+from src.settings.const import (
+    WEB_WORKERS, WEB_KEEPALIVE, WEB_BACKLOG, WEB_GRACEFUL_TIMEOUT, WEB_RELOAD,
+)
 
 
-async def main():
-    app.include_router(router=login_logout.router)
-    app.include_router(router=reg.router)
-    app.include_router(router=genres.router)
-    app.include_router(router=authors.router)
-    app.include_router(router=books.router)
-    app.include_router(router=reserv.router)
-    config = uvicorn.Config(
-        app="main:app", host="0.0.0.0", 
-        port=8000, reload=True
-    )
-    server = uvicorn.Server(config=config)
+def main():
+    """Run the API.
+
+    Production mode starts WEB_WORKERS processes on uvloop and
+    httptools. On SIGTERM each worker stops accepting, finishes
+    in-flight requests for up to WEB_GRACEFUL_TIMEOUT seconds and runs
+    the shutdown handlers. WEB_RELOAD gives the single-process dev
+    server with file watching instead.
+    """
     logger.info(msg="SERVER STARTED")
-    await server.serve()
+    uvicorn.run(
+        app="src.settings.asgi:app", host="0.0.0.0", port=8000,
+        reload=WEB_RELOAD, workers=None if WEB_RELOAD else WEB_WORKERS,
+        loop="uvloop", http="httptools", lifespan="on",
+        backlog=WEB_BACKLOG, timeout_keep_alive=WEB_KEEPALIVE,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT
+    )
 
-async def shutdown():
-    await AIOREDIS.aclose()
-    logger.info(msg="SHUTDOWN SERVER")
 
-    
 if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    finally:
-        asyncio.run(shutdown())
+    main()
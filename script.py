@@ -1,10 +1,11 @@
 # Third-Party
 import click
 from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
 
 # Local
 from src.settings.base import fake, session
-from src.apps.models import Author, Genre, Book
+from src.apps.models import Author, Genre, Book, BookGenre
 
 
 async def create_fake_records():
@@ -40,6 +41,11 @@ async def create_fake_records():
             )
             conn.add(book)
         
+        await conn.flush()
+        stmt = insert(BookGenre).from_select(
+            ["book_id", "genre_id"], select(Book.id, Book.genre_id)
+        ).on_conflict_do_nothing()
+        await conn.execute(stmt)
         await conn.commit()
 
     print("Test data inserted successfully!")
@@ -5,9 +5,11 @@ from .genres import Genre
 from .books import Book
 from .reserv import BookReservation
 from .users import User
+from .avatars import AvatarBlob
+from .listing import BookListing
 
 
 __all__ = [
     "Base", "BookGenre", "Author", "Genre", "Book",
-    "BookReservation", "User"
+    "BookReservation", "User", "AvatarBlob", "BookListing"
 ]
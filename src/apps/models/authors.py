@@ -1,6 +1,6 @@
 # SqlAlchemy
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import BigInteger, String
+from sqlalchemy import BigInteger, String, Index
 
 # Python
 from typing import TYPE_CHECKING
@@ -17,11 +17,14 @@ class Author(Base):
     """Model for Authors."""
 
     __tablename__ = "authors"
+    __table_args__ = (
+        Index("ix_authors_last_name_first_name", "last_name", "first_name"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     first_name: Mapped[str] = mapped_column(String)
     last_name: Mapped[str] = mapped_column(String)
     avatar: Mapped[str] = mapped_column(String, nullable=True)
     books: Mapped[list["Book"]] = relationship(
-        "Book", back_populates="author", lazy="selectin"
+        "Book", back_populates="author", lazy="raise"
     )
@@ -0,0 +1,31 @@
+# SqlAlchemy
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, Index, text
+
+# Python
+from datetime import datetime
+
+# Local
+from .base import Base
+
+
+class AvatarBlob(Base):
+    """Stored avatar image, keyed by the SHA-256 of the upload.
+
+    refcount is kept by triggers on users and authors, a blob released
+    by its last owner is removed by the avatar GC job.
+    """
+
+    __tablename__ = "avatar_blobs"
+    __table_args__ = (
+        Index(
+            "ix_avatar_blobs_released_at", "released_at",
+            postgresql_where=text("refcount <= 0")
+        ),
+    )
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    refcount: Mapped[int] = mapped_column(Integer, default=0)
+    released_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
@@ -1,6 +1,9 @@
 # SqlAlchemy
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import BigInteger, String, Integer, ForeignKey
+from sqlalchemy.orm import (
+    Mapped, mapped_column, relationship, query_expression,
+)
+from sqlalchemy import BigInteger, String, Integer, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 # Python
 from typing import TYPE_CHECKING
@@ -19,6 +22,9 @@ class Book(Base):
     """Model for Books."""
 
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_genre_id", "genre_id"),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     title: Mapped[str] = mapped_column(String, unique=True)
@@ -34,10 +40,19 @@ class Book(Base):
             "genres.id", ondelete="CASCADE", onupdate="CASCADE"
         ),
     )
+    # Filled by the books_search_update trigger from title and author name,
+    # searched through the copy in book_listing.
+    search_document: Mapped[str] = mapped_column(
+        Text, nullable=True, deferred=True
+    )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True
+    )
+    rank: Mapped[float] = query_expression()
     author: Mapped["Author"] = relationship(
-        "Author", back_populates="books", lazy="selectin"
+        "Author", back_populates="books", lazy="raise"
     )
     genres: Mapped[list["Genre"]] = relationship(
         secondary="books_genres",
-        back_populates="books", lazy="selectin"
+        back_populates="books", lazy="raise"
     )
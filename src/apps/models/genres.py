@@ -20,8 +20,8 @@ class Genre(Base):
     __tablename__ = "genres"
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    title: Mapped[str] = mapped_column(String)
+    title: Mapped[str] = mapped_column(String, index=True)
     books: Mapped[list["Book"]] = relationship(
         secondary="books_genres",
-        back_populates="genres", lazy="selectin"
+        back_populates="genres", lazy="raise"
     )
@@ -0,0 +1,68 @@
+# SqlAlchemy
+from sqlalchemy.orm import Mapped, mapped_column, query_expression
+from sqlalchemy import BigInteger, String, Integer, ForeignKey, Index, Text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+
+# Local
+from .base import Base
+
+
+class BookListing(Base):
+    """One flat row per book with its author and genres inlined.
+
+    Written only by triggers on books, authors, genres and books_genres
+    in the same transaction as the change, so listings and search read a
+    page with a single index scan and no joins. Never write to it.
+    """
+
+    __tablename__ = "book_listing"
+    __table_args__ = (
+        Index("ix_book_listing_price_book_id", "price", "book_id"),
+        Index("ix_book_listing_author_id_book_id", "author_id", "book_id"),
+        Index(
+            "ix_book_listing_author_id_price_book_id",
+            "author_id", "price", "book_id"
+        ),
+        Index("ix_book_listing_pages", "pages"),
+        Index("ix_book_listing_author_first_name", "author_first_name"),
+        Index("ix_book_listing_author_last_name", "author_last_name"),
+        Index(
+            "ix_book_listing_genre_ids", "genre_ids",
+            postgresql_using="gin"
+        ),
+        Index(
+            "ix_book_listing_search_vector", "search_vector",
+            postgresql_using="gin"
+        ),
+        Index(
+            "ix_book_listing_search_document_trgm", "search_document",
+            postgresql_using="gin",
+            postgresql_ops={"search_document": "gin_trgm_ops"}
+        ),
+    )
+
+    book_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("books.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    title: Mapped[str] = mapped_column(String)
+    price: Mapped[int] = mapped_column(Integer)
+    pages: Mapped[int] = mapped_column(Integer)
+    author_id: Mapped[int] = mapped_column(BigInteger)
+    author_first_name: Mapped[str] = mapped_column(String)
+    author_last_name: Mapped[str] = mapped_column(String)
+    author_avatar: Mapped[str] = mapped_column(String, nullable=True)
+    # Sorted by genre id, titles in the same order.
+    genre_ids: Mapped[list[int]] = mapped_column(
+        ARRAY(BigInteger), server_default="{}"
+    )
+    genre_titles: Mapped[list[str]] = mapped_column(
+        ARRAY(String), server_default="{}"
+    )
+    search_document: Mapped[str] = mapped_column(
+        Text, nullable=True, deferred=True
+    )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True
+    )
+    rank: Mapped[float] = query_expression()
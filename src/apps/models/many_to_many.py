@@ -1,6 +1,6 @@
 # SqlAlchemy
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy import BigInteger, ForeignKey, Index
 
 # Local
 from .base import Base
@@ -10,10 +10,15 @@ class BookGenre(Base):
     """Many-to-many relationship between books and genres."""
 
     __tablename__ = "books_genres"
+    __table_args__ = (
+        Index("ix_books_genres_genre_id_book_id", "genre_id", "book_id"),
+    )
 
     book_id: Mapped[int] = mapped_column(
-        BigInteger, ForeignKey("books.id"), primary_key=True
+        BigInteger, ForeignKey("books.id", ondelete="CASCADE"),
+        primary_key=True
     )
     genre_id: Mapped[int] = mapped_column(
-        BigInteger, ForeignKey("genres.id"), primary_key=True
+        BigInteger, ForeignKey("genres.id", ondelete="CASCADE"),
+        primary_key=True
     )
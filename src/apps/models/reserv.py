@@ -1,6 +1,9 @@
 # SqlAlchemy
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import BigInteger, ForeignKey, Date, Boolean
+from sqlalchemy import (
+    BigInteger, ForeignKey, Date, Boolean, Index, func, text, column,
+)
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 
 # Python
 from datetime import date
@@ -13,6 +16,21 @@ class BookReservation(Base):
     """Model for reservation books"""
 
     __tablename__ = "reserv"
+    __table_args__ = (
+        # One copy can't be on hands twice for overlapping dates.
+        ExcludeConstraint(
+            ("book_id", "="),
+            (func.daterange(
+                column("begin_date"), column("end_date"), text("'[]'")
+            ), "&&"),
+            name="reserv_book_id_dates_excl", using="gist",
+            where=text("on_hands")
+        ),
+        Index(
+            "ix_reserv_end_date_active", "end_date",
+            postgresql_where=text("NOT is_returned")
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey(
@@ -25,5 +43,5 @@ class BookReservation(Base):
     end_date: Mapped[date] = mapped_column(Date, index=True)
     on_hands: Mapped[bool] = mapped_column(Boolean, default=True)
     is_returned: Mapped[bool] = mapped_column(Boolean, default=False)
-    user = relationship("User", lazy="selectin")
-    book = relationship("Book", lazy="selectin")
+    user = relationship("User", lazy="raise")
+    book = relationship("Book", lazy="raise")
@@ -18,6 +18,7 @@ class AllAuthorsSchema(BaseModel):
     """Schema for view all Authors."""
 
     response: list[AuthorSchema]
+    next_cursor: str | None = None
 
 
 class CreateAuthorSchema(BaseModel):
@@ -24,6 +24,7 @@ class AllBooksSchema(BaseModel):
     """Schema for all books view."""
 
     response: list[BookSchema]
+    next_cursor: str | None = None
 
 
 class CreateBookSchema(BaseModel):
@@ -53,3 +54,67 @@ class ZipBookSchema(BaseModel):
     pages: int = Field(ge=0, le=5000)
     author_id: int = Field(ge=0)
     genre_id: int = Field(ge=0)
+
+
+class ImportBookSchema(BaseModel):
+    """Schema for one row of a bulk import."""
+
+    title: str = Field(min_length=1)
+    price: int = Field(ge=0)
+    pages: int = Field(ge=0, le=5000)
+    first_name: str = Field(min_length=1)
+    last_name: str = Field(min_length=1)
+    genre: str = Field(min_length=1)
+
+
+class ImportErrorSchema(BaseModel):
+    """Schema for a rejected import row."""
+
+    line: int = Field(ge=0)
+    error: str = Field(...)
+
+
+class ImportResultSchema(BaseModel):
+    """Schema for bulk import summary."""
+
+    inserted: int = Field(ge=0)
+    updated: int = Field(ge=0)
+    error_count: int = Field(ge=0)
+    errors: list[ImportErrorSchema]
+
+
+MAX_BATCH = 1000
+
+
+class BatchBooksSchema(BaseModel):
+    """Schema for books fetched by ids."""
+
+    response: list[BookSchema]
+    missing: list[int]
+
+
+class BatchCreateBooksSchema(BaseModel):
+    """Schema for creating many books at once."""
+
+    books: list[CreateBookSchema] = Field(min_length=1, max_length=MAX_BATCH)
+
+
+class BatchUpdateBookSchema(UpdateBookSchema):
+    """Schema for one book of a batch update."""
+
+    id: int = Field(ge=0)
+
+
+class BatchUpdateBooksSchema(BaseModel):
+    """Schema for updating many books at once."""
+
+    books: list[BatchUpdateBookSchema] = Field(
+        min_length=1, max_length=MAX_BATCH
+    )
+
+
+class BatchResultSchema(BaseModel):
+    """Schema for batch mutation result."""
+
+    ids: list[int]
+    missing: list[int] = []
@@ -21,6 +21,7 @@ class GetReservationSchema(BaseModel):
 
 class AllReservationsSchema(BaseModel):
     response: list[GetReservationSchema]
+    next_cursor: str | None = None
     
 
 class CreateReserveSchema(BaseModel):
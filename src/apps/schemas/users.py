@@ -24,6 +24,7 @@ class UserRead(schemas.BaseUser[int]):
 
 class AllUsersSchema(BaseModel):
     response: list[UserRead]
+    next_cursor: str | None = None
 
 
 class UserCreate(schemas.BaseUserCreate):
@@ -0,0 +1,51 @@
+# Third-Party
+from sqlalchemy import select, delete, and_
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# Python
+from datetime import datetime, timedelta, timezone
+import os
+import shutil
+
+# Local
+from src.settings.const import VOLUME
+from src.apps.models.avatars import AvatarBlob
+
+
+AVATARS_ROOT = os.path.join(VOLUME, "avatars")
+
+
+def avatar_dir(digest: str) -> str:
+    """Thumbnail directory of an image, fanned out as ab/cd/<digest>."""
+    return os.path.join(AVATARS_ROOT, digest[:2], digest[2:4], digest)
+
+
+async def collect_avatars(
+    session: async_sessionmaker, batch_size: int, grace: int
+) -> int:
+    """Delete blobs nobody has referenced for grace seconds.
+
+    Files are removed while the rows are still locked, so an owner that
+    picks the same image up again waits for the commit and then sees
+    the directory gone and renders it anew.
+    """
+    cutoff = datetime.now(tz=timezone.utc) - timedelta(seconds=grace)
+    orphans = select(AvatarBlob.digest).where(and_(
+        AvatarBlob.refcount <= 0,
+        AvatarBlob.released_at < cutoff
+    )).limit(batch_size).with_for_update(skip_locked=True).cte("orphans")
+    stmt = delete(AvatarBlob).where(
+        AvatarBlob.digest == orphans.c.digest
+    ).returning(AvatarBlob.digest)
+
+    total = 0
+    while True:
+        async with session() as conn:
+            result = await conn.execute(statement=stmt)
+            digests = result.scalars().all()
+            for digest in digests:
+                shutil.rmtree(avatar_dir(digest=digest), ignore_errors=True)
+            await conn.commit()
+        total += len(digests)
+        if len(digests) < batch_size:
+            return total
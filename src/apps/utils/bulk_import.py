@@ -0,0 +1,188 @@
+# Third-Party
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+# Python
+from typing import IO, Iterator, Literal
+import csv
+import io
+import json
+
+# Local
+from src.apps.schemas.books import (
+    ImportBookSchema, ImportErrorSchema, ImportResultSchema,
+)
+
+
+BATCH_SIZE = 10000
+MAX_REPORTED_ERRORS = 1000
+COLUMNS = ("title", "price", "pages", "first_name", "last_name", "genre")
+
+CREATE_STAGING = """
+    CREATE TEMP TABLE books_import (
+        line bigint, title text, price integer, pages integer,
+        first_name text, last_name text, genre text
+    ) ON COMMIT DROP
+"""
+COPY_STAGING = f"COPY books_import (line, {', '.join(COLUMNS)}) FROM STDIN"
+INSERT_AUTHORS = """
+    INSERT INTO authors (first_name, last_name)
+    SELECT DISTINCT s.first_name, s.last_name FROM books_import s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM authors a
+        WHERE a.first_name = s.first_name AND a.last_name = s.last_name
+    )
+"""
+INSERT_GENRES = """
+    INSERT INTO genres (title)
+    SELECT DISTINCT s.genre FROM books_import s
+    WHERE NOT EXISTS (SELECT 1 FROM genres g WHERE g.title = s.genre)
+"""
+DUPLICATES = """
+    SELECT line, title FROM (
+        SELECT line, title, row_number() OVER (
+            PARTITION BY title ORDER BY line DESC
+        ) AS n FROM books_import
+    ) ranked WHERE n > 1 ORDER BY line LIMIT :limit
+"""
+UPSERT_BOOKS = """
+    WITH authors_ids AS (
+        SELECT DISTINCT ON (first_name, last_name) id, first_name, last_name
+        FROM authors
+        WHERE (first_name, last_name) IN (
+            SELECT first_name, last_name FROM books_import
+        )
+        ORDER BY first_name, last_name, id
+    ), genres_ids AS (
+        SELECT DISTINCT ON (title) id, title FROM genres
+        WHERE title IN (SELECT genre FROM books_import)
+        ORDER BY title, id
+    ), previous AS (
+        -- Primary genres before this statement, CTEs share its snapshot.
+        SELECT id, genre_id FROM books
+        WHERE title IN (SELECT title FROM books_import)
+    ), upserted AS (
+        INSERT INTO books (title, price, pages, author_id, genre_id)
+        SELECT DISTINCT ON (s.title) s.title, s.price, s.pages, a.id, g.id
+        FROM books_import s
+        JOIN authors_ids a USING (first_name, last_name)
+        JOIN genres_ids g ON g.title = s.genre
+        ORDER BY s.title, s.line DESC
+        ON CONFLICT (title) DO UPDATE SET
+            price = EXCLUDED.price, pages = EXCLUDED.pages,
+            author_id = EXCLUDED.author_id, genre_id = EXCLUDED.genre_id
+        RETURNING id, genre_id, xmax = 0 AS inserted
+    ), unlinked AS (
+        DELETE FROM books_genres bg
+        USING previous p JOIN upserted u ON u.id = p.id
+        WHERE u.genre_id <> p.genre_id
+            AND bg.book_id = p.id AND bg.genre_id = p.genre_id
+    ), linked AS (
+        INSERT INTO books_genres (book_id, genre_id)
+        SELECT id, genre_id FROM upserted
+        ON CONFLICT DO NOTHING
+    )
+    SELECT count(*) FILTER (WHERE inserted),
+           count(*) FILTER (WHERE NOT inserted)
+    FROM upserted
+"""
+
+
+def _records(
+    stream: IO[bytes], file_format: Literal["ndjson", "csv"]
+) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield (line, record, error) for every data line of stream."""
+    lines = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Line is not a JSON object"
+            continue
+        yield number, record, None
+
+
+def _read_batch(
+    records: Iterator[tuple[int, dict | None, str | None]]
+) -> tuple[list[tuple], list[ImportErrorSchema], bool]:
+    """Validate up to BATCH_SIZE records, return rows, errors, exhausted."""
+    rows, errors = [], []
+    for line, record, error in records:
+        if record is not None:
+            try:
+                book = ImportBookSchema.model_validate(record)
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(map(str, item['loc']))}: {item['msg']}"
+                    for item in e.errors()
+                )
+            else:
+                rows.append((line, *(getattr(book, c) for c in COLUMNS)))
+        if error:
+            errors.append(ImportErrorSchema(line=line, error=error))
+        if len(rows) + len(errors) >= BATCH_SIZE:
+            return rows, errors, False
+    return rows, errors, True
+
+
+async def import_books(
+    session: AsyncSession, stream: IO[bytes],
+    file_format: Literal["ndjson", "csv"]
+) -> ImportResultSchema:
+    """Load books from stream, return the summary.
+
+    Rows are parsed in bounded batches off the event loop and streamed
+    with COPY into a temporary staging table. Missing authors and genres
+    are then created and books upserted by title in a few set-based
+    statements. The caller owns the transaction and must commit.
+    """
+    await session.execute(text(CREATE_STAGING))
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    records = _records(stream=stream, file_format=file_format)
+    errors: list[ImportErrorSchema] = []
+    error_count = 0
+    async with raw.driver_connection.cursor() as cursor:
+        async with cursor.copy(COPY_STAGING) as copy:
+            done = False
+            while not done:
+                rows, batch_errors, done = await run_in_threadpool(
+                    _read_batch, records
+                )
+                for row in rows:
+                    await copy.write_row(row)
+                error_count += len(batch_errors)
+                errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+    await session.execute(text(INSERT_AUTHORS))
+    await session.execute(text(INSERT_GENRES))
+    error_count += (await session.execute(text(
+        "SELECT count(*) - count(DISTINCT title) FROM books_import"
+    ))).scalar()
+    duplicates = await session.execute(
+        text(DUPLICATES), {"limit": MAX_REPORTED_ERRORS}
+    )
+    for line, title in duplicates:
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ImportErrorSchema(
+                line=line, error=f"Duplicate title {title!r}, later row kept"
+            ))
+    result = await session.execute(text(UPSERT_BOOKS))
+    inserted, updated = result.one()
+    errors.sort(key=lambda item: item.line)
+    return ImportResultSchema(
+        inserted=inserted, updated=updated,
+        error_count=error_count, errors=errors
+    )
@@ -0,0 +1,236 @@
+# Third-Party
+from pydantic import BaseModel
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Python
+from typing import Awaitable, Callable
+import asyncio
+import hashlib
+import json
+import time
+
+# Local
+from src.settings.base import AIOREDIS, session, logger
+from src.settings.const import CACHE_TTL, CACHE_STALE_TTL
+from .responses import dumps
+from .versions import CatalogVersions, catalog_versions
+
+
+Loader = Callable[
+    [AsyncSession], Awaitable[tuple[BaseModel | dict | None, list[str]]]
+]
+
+
+class ResultCache:
+    """Redis cache for listing responses with tag-based invalidation.
+
+    Every entry is stored together with the tags of the rows it was built
+    from, and a mutation drops exactly the entries carrying its tags.
+    Entries older than `ttl` are still served for `stale_ttl` seconds
+    while a single background task rebuilds them.
+
+    A fill may have read rows from before a write that has since been
+    invalidated. Invalidation stamps each tag with the Redis clock, and
+    a fill started before any of its tags was stamped is not stored.
+
+    Entries also keep the catalog version of their kinds, read in the
+    same round trip as the fill's start time. Writers bump versions
+    before they invalidate, so an entry holding rows written after a
+    version was bumped never carries that older version, and the ETag
+    made from it stays valid for as long as the entry lives.
+    """
+
+    # KEYS: entry, tag sets, invalidation stamps of the same tags.
+    # ARGV: load start, body, fresh_until, expire, version.
+    STORE = """
+    local n = (#KEYS - 1) / 2
+    for i = 1, n do
+        local stamp = redis.call('GET', KEYS[1 + n + i])
+        if stamp and tonumber(stamp) >= tonumber(ARGV[1]) then
+            return 0
+        end
+    end
+    redis.call(
+        'HSET', KEYS[1], 'body', ARGV[2], 'fresh_until', ARGV[3],
+        'version', ARGV[5]
+    )
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    for i = 1, n do
+        redis.call('SADD', KEYS[1 + i], KEYS[1])
+        redis.call('EXPIRE', KEYS[1 + i], ARGV[4])
+    end
+    return 1
+    """
+    # KEYS: tag sets, then their invalidation stamps. ARGV: stamp ttl.
+    INVALIDATE = """
+    local n = #KEYS / 2
+    local now = redis.call('TIME')
+    local stamp = now[1] * 1000000 + now[2]
+    for i = 1, n do
+        local keys = redis.call('SMEMBERS', KEYS[i])
+        for j = 1, #keys, 1000 do
+            redis.call('DEL', unpack(keys, j, math.min(j + 999, #keys)))
+        end
+        redis.call('DEL', KEYS[i])
+        redis.call('SET', KEYS[n + i], string.format('%d', stamp), 'EX', ARGV[1])
+    end
+    return n
+    """
+
+    def __init__(
+        self, redis: aioredis.Redis, versions: CatalogVersions, ttl: int,
+        stale_ttl: int, prefix: str = "cache"
+    ) -> None:
+        self.redis = redis
+        self.versions = versions
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self._refreshing: set[asyncio.Task] = set()
+        self._store_script = redis.register_script(self.STORE)
+        self._invalidate_script = redis.register_script(self.INVALIDATE)
+
+    def make_key(self, namespace: str, params: dict) -> str:
+        normalized = {
+            key: value for key, value in params.items() if value is not None
+        }
+        raw = json.dumps(
+            normalized, sort_keys=True, separators=(",", ":"), default=str
+        )
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f"{self.prefix}:{namespace}:{digest}"
+
+    def tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def stamp_key(self, tag: str) -> str:
+        return f"{self.prefix}:invalidated:{tag}"
+
+    async def fetch(
+        self, namespace: str, params: dict, kinds: tuple[str, ...],
+        loader: Loader, conn: AsyncSession
+    ) -> tuple[bytes | None, str | None]:
+        """Return the JSON body for params, or None for an empty result,
+        and the version of kinds it was built at."""
+        key = self.make_key(namespace=namespace, params=params)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(key, "body", "fresh_until", "version")
+                self._queue_start(pipe=pipe, kinds=kinds)
+                (body, fresh_until, version), *start = await pipe.execute()
+            started, current = self._started(*start)
+        except RedisError as e:
+            logger.warning(msg=f"Cache read for {key} failed: {e}")
+            body = started = current = None
+        if body is None:
+            body = await self._load(
+                key=key, loader=loader, conn=conn, started=started,
+                version=current
+            )
+            return body, current
+        if float(fresh_until) < time.time():
+            self._revalidate(key=key, loader=loader, kinds=kinds)
+        return body or None, (version or b"").decode() or None
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of tags."""
+        tags = list(dict.fromkeys(tags))
+        try:
+            await self._invalidate_script(
+                keys=[
+                    *(self.tag_key(tag=tag) for tag in tags),
+                    *(self.stamp_key(tag=tag) for tag in tags)
+                ],
+                args=[self.ttl + self.stale_ttl]
+            )
+        except RedisError as e:
+            logger.error(msg=f"Cache invalidation of {tags} failed: {e}")
+
+    async def _load(
+        self, key: str, loader: Loader, conn: AsyncSession,
+        started: int | None, version: str | None
+    ) -> bytes | None:
+        """Build the body and cache it.
+
+        started is the Redis time taken before the rows are read, without
+        it nothing is stored.
+        """
+        result, tags = await loader(conn)
+        body = b"" if result is None else dumps(result)
+        if started is not None:
+            try:
+                await self._store(
+                    key=key, body=body, tags=tags, started=started,
+                    version=version
+                )
+            except RedisError as e:
+                logger.warning(msg=f"Cache write for {key} failed: {e}")
+        return body or None
+
+    async def _store(
+        self, key: str, body: bytes, tags: list[str], started: int,
+        version: str | None
+    ) -> bool:
+        """Store unless a tag was invalidated after started."""
+        tags = list(dict.fromkeys(tags))
+        stored = await self._store_script(
+            keys=[
+                key, *(self.tag_key(tag=tag) for tag in tags),
+                *(self.stamp_key(tag=tag) for tag in tags)
+            ],
+            args=[
+                started, body, time.time() + self.ttl,
+                self.ttl + self.stale_ttl, version or ""
+            ]
+        )
+        return bool(stored)
+
+    def _queue_start(self, pipe, kinds: tuple[str, ...]) -> None:
+        """Queue the reads `_started` takes, version after the time."""
+        pipe.time()
+        pipe.mget(self.versions.keys(kinds=kinds))
+
+    def _started(
+        self, now: tuple[int, int], values: list[bytes | None]
+    ) -> tuple[int, str | None]:
+        """Redis time in microseconds, comparable with the stamps, and
+        the version of kinds."""
+        seconds, micros = now
+        return seconds * 1000000 + micros, self.versions.token(values=values)
+
+    def _revalidate(
+        self, key: str, loader: Loader, kinds: tuple[str, ...]
+    ) -> None:
+        task = asyncio.create_task(
+            self._refresh(key=key, loader=loader, kinds=kinds)
+        )
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def _refresh(
+        self, key: str, loader: Loader, kinds: tuple[str, ...]
+    ) -> None:
+        try:
+            locked = await self.redis.set(
+                f"{key}:lock", 1, nx=True, ex=max(self.stale_ttl, 1)
+            )
+            if not locked:
+                return
+            async with self.redis.pipeline(transaction=False) as pipe:
+                self._queue_start(pipe=pipe, kinds=kinds)
+                started, version = self._started(*await pipe.execute())
+            async with session() as conn:
+                await self._load(
+                    key=key, loader=loader, conn=conn, started=started,
+                    version=version
+                )
+        except Exception as e:
+            logger.warning(msg=f"Cache refresh for {key} failed: {e}")
+
+
+listing_cache = ResultCache(
+    redis=AIOREDIS, versions=catalog_versions, ttl=CACHE_TTL,
+    stale_ttl=CACHE_STALE_TTL
+)
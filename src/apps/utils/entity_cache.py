@@ -0,0 +1,239 @@
+# Third-Party
+from pydantic import BaseModel
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Python
+from collections import OrderedDict
+from typing import Iterable
+import asyncio
+import time
+
+# Local
+from src.settings.base import AIOREDIS, logger
+from src.settings.const import (
+    ENTITY_CACHE_TTL, ENTITY_CACHE_LOCAL_TTL, ENTITY_CACHE_SIZE,
+)
+from src.apps.models import Genre, User
+from src.apps.schemas.genres import GenreSchema
+from src.apps.schemas.users import UserRead
+
+
+class EntityCache:
+    """Read-through cache of rows by primary key.
+
+    Lookups go to an in-process LRU first, then to Redis with one
+    pipelined round trip, and only the remaining ids hit Postgres.
+    Writes publish the changed ids so every worker drops its local copy.
+
+    A fill can race an invalidation: it reads the row, the writer then
+    commits and invalidates, and the fill would put the old row back.
+    Invalidation stamps each key with the Redis clock. A fill only
+    stores a row if the key wasn't stamped after the fill started, and
+    only stores it locally if nothing was dropped in this process
+    meanwhile.
+    """
+
+    # KEYS: entries, then their stamps. ARGV: start, ttl, bodies.
+    STORE = """
+    local n = #KEYS / 2
+    local stored = {}
+    for i = 1, n do
+        local stamp = redis.call('GET', KEYS[n + i])
+        if stamp and tonumber(stamp) >= tonumber(ARGV[1]) then
+            stored[i] = 0
+        else
+            redis.call('SET', KEYS[i], ARGV[2 + i], 'EX', ARGV[2])
+            stored[i] = 1
+        end
+    end
+    return stored
+    """
+    # KEYS: entries, then their stamps. ARGV: stamp ttl.
+    INVALIDATE = """
+    local n = #KEYS / 2
+    local now = redis.call('TIME')
+    local stamp = string.format('%d', now[1] * 1000000 + now[2])
+    for i = 1, n do
+        redis.call('DEL', KEYS[i])
+        redis.call('SET', KEYS[n + i], stamp, 'EX', ARGV[1])
+    end
+    return n
+    """
+
+    schemas: dict[type, type[BaseModel]] = {
+        Genre: GenreSchema,
+        User: UserRead,
+    }
+
+    def __init__(
+        self, redis: aioredis.Redis, ttl: int, local_ttl: int,
+        local_size: int, channel: str = "entity:invalidate"
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_size = local_size
+        self.channel = channel
+        self._local: OrderedDict[str, tuple[float, BaseModel]] = OrderedDict()
+        # Bumped whenever a key is dropped locally.
+        self._drops = 0
+        self._listener: asyncio.Task | None = None
+        self._store_script = redis.register_script(self.STORE)
+        self._invalidate_script = redis.register_script(self.INVALIDATE)
+
+    @staticmethod
+    def key(model: type, pk: int) -> str:
+        return f"entity:{model.__tablename__}:{pk}"
+
+    @staticmethod
+    def stamp_key(key: str) -> str:
+        return f"{key}:invalidated"
+
+    async def get(
+        self, conn: AsyncSession, model: type, pk: int
+    ) -> BaseModel | None:
+        found = await self.get_many(conn=conn, model=model, ids=[pk])
+        return found.get(pk)
+
+    async def get_many(
+        self, conn: AsyncSession, model: type, ids: Iterable[int]
+    ) -> dict[int, BaseModel]:
+        """Return cached schemas for the ids that exist."""
+        schema = self.schemas[model]
+        found = {}
+        missing = []
+        for pk in dict.fromkeys(ids):
+            value = self._local_get(key=self.key(model=model, pk=pk))
+            if value is None:
+                missing.append(pk)
+            else:
+                found[pk] = value
+        if not missing:
+            return found
+
+        drops = self._drops
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for pk in missing:
+                    pipe.get(self.key(model=model, pk=pk))
+                pipe.time()
+                *bodies, (seconds, micros) = await pipe.execute()
+            started = seconds * 1000000 + micros
+        except RedisError as e:
+            logger.warning(msg=f"Entity cache read failed: {e}")
+            bodies = [None] * len(missing)
+            started = None
+        unknown = []
+        for pk, body in zip(missing, bodies):
+            if body is None:
+                unknown.append(pk)
+                continue
+            value = schema.model_validate_json(body)
+            if self._drops == drops:
+                self._local_set(
+                    key=self.key(model=model, pk=pk), value=value
+                )
+            found[pk] = value
+        if not unknown:
+            return found
+
+        query = select(model).where(model.id.in_(unknown))
+        temp = await conn.execute(query)
+        loaded = {
+            row.id: schema.model_validate(row, from_attributes=True)
+            for row in temp.scalars().all()
+        }
+        found.update(loaded)
+        if not loaded or started is None:
+            return found
+        keys = [self.key(model=model, pk=pk) for pk in loaded]
+        try:
+            stored = await self._store_script(
+                keys=[*keys, *(self.stamp_key(key=key) for key in keys)],
+                args=[
+                    started, self.ttl,
+                    *(value.model_dump_json() for value in loaded.values())
+                ]
+            )
+        except RedisError as e:
+            logger.warning(msg=f"Entity cache write failed: {e}")
+            return found
+        if self._drops == drops:
+            for key, value, ok in zip(keys, loaded.values(), stored):
+                if ok:
+                    self._local_set(key=key, value=value)
+        return found
+
+    async def invalidate(self, model: type, *ids: int) -> None:
+        """Drop ids everywhere and tell the other workers to do the same."""
+        if not ids:
+            return
+        keys = [self.key(model=model, pk=pk) for pk in ids]
+        self._drop(keys=keys)
+        try:
+            await self._invalidate_script(
+                keys=[*keys, *(self.stamp_key(key=key) for key in keys)],
+                args=[self.ttl]
+            )
+            await self.redis.publish(self.channel, " ".join(keys))
+        except RedisError as e:
+            logger.error(msg=f"Entity cache invalidation failed: {e}")
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Messages sent while we were disconnected are lost.
+                    self._clear()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        self._drop(keys=message["data"].decode().split())
+            except RedisError as e:
+                logger.warning(msg=f"Entity cache listener failed: {e}")
+                self._clear()
+                await asyncio.sleep(1)
+
+    def _drop(self, keys: list[str]) -> None:
+        self._drops += 1
+        for key in keys:
+            self._local.pop(key, None)
+
+    def _clear(self) -> None:
+        self._drops += 1
+        self._local.clear()
+
+    def _local_get(self, key: str) -> BaseModel | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _local_set(self, key: str, value: BaseModel) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+
+entity_cache = EntityCache(
+    redis=AIOREDIS, ttl=ENTITY_CACHE_TTL,
+    local_ttl=ENTITY_CACHE_LOCAL_TTL, local_size=ENTITY_CACHE_SIZE
+)
@@ -0,0 +1,69 @@
+# Third-Party
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import update, and_
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+# Python
+from datetime import date, datetime, time, timezone
+
+# Local
+from src.settings.base import logger
+from src.apps.models.reserv import BookReservation
+
+
+EXPIRY_KEY = "reserv:expiry"
+
+
+def expiry_score(end_date: date) -> float:
+    """Moment a reservation ending on end_date is finished (00:00 UTC)."""
+    return datetime.combine(end_date, time.min, tzinfo=timezone.utc).timestamp()
+
+
+async def schedule_expiry(
+    redis: aioredis.Redis, reserv_id: int, end_date: date
+) -> None:
+    try:
+        await redis.zadd(EXPIRY_KEY, {reserv_id: expiry_score(end_date)})
+    except RedisError as e:
+        # The nightly sweep still finishes it, just later.
+        logger.warning(msg=f"Can't schedule expiry of {reserv_id}: {e}")
+
+
+async def cancel_expiry(redis: aioredis.Redis, *reserv_ids: int) -> None:
+    if not reserv_ids:
+        return
+    try:
+        await redis.zrem(EXPIRY_KEY, *reserv_ids)
+    except RedisError as e:
+        logger.warning(msg=f"Can't cancel expiry of {reserv_ids}: {e}")
+
+
+async def expire_due(
+    redis: aioredis.Redis, session: async_sessionmaker, batch_size: int
+) -> int:
+    """Finish reservations whose expiry is due, batch by batch.
+
+    Ids leave the set only after their batch is committed, so a crash
+    retries them on the next poll; the update is idempotent.
+    """
+    total = 0
+    while True:
+        now = datetime.now(tz=timezone.utc).timestamp()
+        members = await redis.zrangebyscore(
+            EXPIRY_KEY, "-inf", now, start=0, num=batch_size
+        )
+        if not members:
+            return total
+        ids = [int(member) for member in members]
+        stmt = update(BookReservation).where(and_(
+            BookReservation.id.in_(ids),
+            BookReservation.is_returned == False
+        )).values(is_returned=True, on_hands=False)
+        async with session() as conn:
+            result = await conn.execute(statement=stmt)
+            await conn.commit()
+        await redis.zrem(EXPIRY_KEY, *members)
+        total += result.rowcount
+        if len(members) < batch_size:
+            return total
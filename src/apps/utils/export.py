@@ -0,0 +1,86 @@
+# Third-Party
+from sqlalchemy import Select, select
+
+# Python
+from typing import AsyncIterator, Literal
+import csv
+import io
+import json
+
+# Local
+from src.settings.base import session
+from src.apps.models import BookListing
+
+
+EXPORT_BATCH_SIZE = 2000
+CSV_HEADER = (
+    "id", "title", "price", "pages", "author_id", "author_first_name",
+    "author_last_name", "genre_ids", "genre_titles",
+)
+
+
+def export_query(conditions: list) -> Select:
+    """Flat book rows straight from the book_listing projection."""
+    query = select(
+        BookListing.book_id, BookListing.title, BookListing.price,
+        BookListing.pages, BookListing.author_id,
+        BookListing.author_first_name, BookListing.author_last_name,
+        BookListing.author_avatar, BookListing.genre_ids,
+        BookListing.genre_titles
+    )
+    if conditions:
+        query = query.where(*conditions)
+    return query.order_by(BookListing.book_id)
+
+
+def _ndjson(rows: list) -> str:
+    lines = []
+    for (book_id, title, price, pages, author_id, first_name, last_name,
+         avatar, genre_ids, genre_titles) in rows:
+        lines.append(json.dumps({
+            "id": book_id, "title": title, "price": price, "pages": pages,
+            "author": {
+                "id": author_id, "first_name": first_name,
+                "last_name": last_name, "avatar": avatar,
+            },
+            "genre": [
+                {"id": genre_id, "title": genre_title}
+                for genre_id, genre_title in zip(genre_ids, genre_titles)
+            ],
+        }, ensure_ascii=False))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _csv(rows: list) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for (book_id, title, price, pages, author_id, first_name, last_name,
+         _, genre_ids, genre_titles) in rows:
+        writer.writerow((
+            book_id, title, price, pages, author_id, first_name, last_name,
+            "|".join(str(genre_id) for genre_id in genre_ids),
+            "|".join(genre_titles),
+        ))
+    return buffer.getvalue()
+
+
+async def stream_books(
+    query: Select, file_format: Literal["ndjson", "csv"]
+) -> AsyncIterator[bytes]:
+    """Encode query rows batch by batch from a server-side cursor.
+
+    Opens its own session because the response body is produced after
+    the request dependencies are closed.
+    """
+    encode = _csv if file_format == "csv" else _ndjson
+    if file_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(CSV_HEADER)
+        yield buffer.getvalue().encode()
+    async with session() as conn:
+        result = await conn.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield encode(rows).encode()
@@ -0,0 +1,190 @@
+# FastApi
+from fastapi import UploadFile
+
+# Third-Party
+from PIL import Image, ImageOps
+
+# Python
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import logging
+import mmap
+import multiprocessing
+import os
+import shutil
+
+# Local
+from src.settings.const import IMAGE_WORKERS
+from .uploads import InvalidUpload, UploadRoute, claim_upload
+
+
+THUMBNAIL_SIZES = (64, 128, 256)
+MAX_DIMENSION = 4096
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidImage(InvalidUpload):
+    """Upload is not an image we are willing to decode."""
+
+
+def sniff_image(head: bytes) -> bool:
+    """Check magic bytes of the formats we accept."""
+    return head.startswith((
+        b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF87a", b"GIF89a"
+    )) or (head[:4] == b"RIFF" and head[8:12] == b"WEBP")
+
+
+class ImageUploadRoute(UploadRoute):
+    """Upload route that only takes files with image magic bytes."""
+
+    sniff = staticmethod(sniff_image)
+
+
+def probe_image(path: str) -> tuple[str, tuple[int, int]]:
+    """Read only the image header and check format and dimensions."""
+    try:
+        with open(path, "rb") as handle, \
+                mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                Image.open(data) as image:
+            image_format, size = image.format, image.size
+    except Exception:
+        raise InvalidImage("File is not a supported image")
+    if max(size) > MAX_DIMENSION:
+        raise InvalidImage(
+            f"Image is larger than {MAX_DIMENSION}x{MAX_DIMENSION}"
+        )
+    return image_format, size
+
+
+async def accept_image(upload: UploadFile) -> tuple[str, str]:
+    """Claim an image spooled by ImageUploadRoute and validate it.
+
+    Returns the spooled path and the content digest.
+    """
+    path, digest = claim_upload(upload=upload)
+    try:
+        probe_image(path=path)
+    except InvalidImage:
+        os.remove(path)
+        raise
+    return path, digest
+
+
+def render_thumbnails(path: str, target_dir: str) -> list[str]:
+    """Write every thumbnail size as WebP and JPEG into target_dir.
+
+    Runs in a worker process and consumes the spooled upload at path,
+    reading it through a memory map. Frames are decoded once, rotated by
+    their EXIF orientation and saved without any metadata. target_dir is
+    content-addressed, so an existing one is kept as is.
+    """
+    Image.MAX_IMAGE_PIXELS = MAX_DIMENSION * MAX_DIMENSION
+    if os.path.isdir(target_dir):
+        os.remove(path)
+        return []
+    try:
+        with open(path, "rb") as handle, \
+                mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                Image.open(data) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert(
+                "RGBA" if "A" in image.getbands() else "RGB"
+            )
+    finally:
+        os.remove(path)
+    # Render next to the target and rename, readers never see a half set.
+    os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+    staging = f"{target_dir}.{os.getpid()}.tmp"
+    os.makedirs(staging, exist_ok=True)
+    names = []
+    for size in THUMBNAIL_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+        thumbnail.save(
+            os.path.join(staging, f"{size}.webp"), "WEBP",
+            quality=WEBP_QUALITY, method=4
+        )
+        thumbnail.convert("RGB").save(
+            os.path.join(staging, f"{size}.jpg"), "JPEG",
+            quality=JPEG_QUALITY, optimize=True
+        )
+        names.extend((f"{size}.webp", f"{size}.jpg"))
+    try:
+        os.rename(staging, target_dir)
+    except OSError:
+        # Same image rendered concurrently, theirs won.
+        shutil.rmtree(staging, ignore_errors=True)
+    return [os.path.join(target_dir, name) for name in names]
+
+
+def resize_image(source: str, target: str, size: int) -> str:
+    """Scale source to fit size x size and write it to target.
+
+    Runs in a worker process. The output keeps the source format and
+    appears at target atomically.
+    """
+    Image.MAX_IMAGE_PIXELS = MAX_DIMENSION * MAX_DIMENSION
+    with Image.open(source) as image:
+        image_format = image.format
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        staging = f"{target}.{os.getpid()}.tmp"
+        image.save(staging, image_format)
+    os.replace(staging, target)
+    return target
+
+
+class ImagePipeline:
+    """Process pool that renders avatars away from the event loop."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending: set[asyncio.Future] = set()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned children don't inherit the server's threads and sockets.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def queue(self, path: str, target_dir: str) -> asyncio.Future:
+        """Start rendering and return at once, failures are logged."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.pool, render_thumbnails, path, target_dir
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    async def resize(self, source: str, target: str, size: int) -> str:
+        """Render a resized copy and wait for it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, resize_image, source, target, size
+        )
+
+    def _done(self, future: asyncio.Future) -> None:
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception():
+            logger.error(
+                msg=f"Avatar rendering failed: {future.exception()!r}"
+            )
+
+    async def shutdown(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+image_pipeline = ImagePipeline(workers=IMAGE_WORKERS)
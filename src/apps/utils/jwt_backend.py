@@ -3,17 +3,78 @@ from fastapi_users.authentication import (
     AuthenticationBackend, BearerTransport, JWTStrategy,
 )
 from fastapi_users import FastAPIUsers
+from fastapi_users.jwt import decode_jwt, generate_jwt
+import jwt
+
+# Python
+from typing import Optional
+import secrets
 
 # Local
 from src.settings.const import JWT_KEY
 from src.apps.models.users import User
-from .manager import get_user_manager
+from .manager import get_user_manager, UserManager
+from .entity_cache import entity_cache
+from .revocation import revocation
 
 
 bearer_transport = BearerTransport(tokenUrl="auth/login/")
 
+
+class CachedJWTStrategy(JWTStrategy[User, int]):
+    """JWT strategy that reads the user through the entity cache.
+
+    The token signature, expiry and revocation are still checked on
+    every request, only the row lookup is cached. Changes to a user
+    invalidate it. Tokens carry a jti so logout can revoke them.
+    """
+
+    async def write_token(self, user: User) -> str:
+        data = {
+            "sub": str(user.id), "aud": self.token_audience,
+            "jti": secrets.token_urlsafe(16)
+        }
+        return generate_jwt(
+            data, self.encode_key, self.lifetime_seconds,
+            algorithm=self.algorithm
+        )
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience,
+                algorithms=[self.algorithm]
+            )
+        except jwt.PyJWTError:
+            return
+        if "jti" in data and "exp" in data:
+            await revocation.revoke(jti=data["jti"], expires=data["exp"])
+
+    async def read_token(
+        self, token: Optional[str], user_manager: UserManager
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience,
+                algorithms=[self.algorithm]
+            )
+            user_id = int(data["sub"])
+        except (jwt.PyJWTError, KeyError, ValueError):
+            return None
+        if "jti" in data and await revocation.is_revoked(jti=data["jti"]):
+            return None
+        schema = await entity_cache.get(
+            conn=user_manager.user_db.session, model=User, pk=user_id
+        )
+        if schema is None:
+            return None
+        return User(**schema.model_dump())
+
+
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=JWT_KEY, lifetime_seconds=60*60*6)
+    return CachedJWTStrategy(secret=JWT_KEY, lifetime_seconds=60*60*6)
 
 auth_backend = AuthenticationBackend(
     name="jwt",
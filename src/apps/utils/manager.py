@@ -6,16 +6,18 @@ from fastapi_users import (
     BaseUserManager, IntegerIDMixin, InvalidPasswordException,
 )
 from fastapi_users.db import SQLAlchemyUserDatabase
-from fastapi_users import exceptions
+from fastapi_users import exceptions, schemas
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Python
-from typing import Optional
+from typing import Any, Optional
 
 # Local
 from src.apps.models.users import User
 from src.apps.schemas.users import UserLogin
 from .session import get_async_session
+from .passwords import password_helper, password_pool
+from .entity_cache import entity_cache
 from src.settings.base import logger
 
 
@@ -70,17 +72,60 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     async def on_after_verify(
         self, user: User, request: Optional[Request] = None
     ):
+        await entity_cache.invalidate(User, user.id)
         logger.info(msg=f"User {user.id} has been verified")
 
+    async def on_after_update(
+        self, user: User, update_dict: dict[str, Any],
+        request: Optional[Request] = None
+    ):
+        await entity_cache.invalidate(User, user.id)
+
+    async def on_after_delete(
+        self, user: User, request: Optional[Request] = None
+    ):
+        await entity_cache.invalidate(User, user.id)
+
+    async def create(
+        self, user_create: schemas.UC, safe: bool = False,
+        request: Optional[Request] = None
+    ) -> User:
+        """Same as BaseUserManager.create, with the hash off the loop."""
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await password_pool.hash(password)
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        password = update_dict.pop("password", None)
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict["hashed_password"] = await password_pool.hash(password)
+        return await super()._update(user, update_dict)
+
     async def authenticate(self, credentials: UserLogin) -> User | None:
         try:
             user = await self.get_by_email(credentials.email)
         except exceptions.UserNotExists:
-            self.password_helper.hash(credentials.password)
+            # Spend the same time as a real check.
+            await password_pool.hash(credentials.password)
             return None
 
         verified, updated_password_hash = \
-            self.password_helper.verify_and_update(
+            await password_pool.verify_and_update(
                 credentials.password, user.hashed_password
             )
         if not verified:
@@ -94,4 +139,4 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
 
 
 async def get_user_manager(user_db=Depends(get_user_db)):
-    yield UserManager(user_db)
+    yield UserManager(user_db, password_helper=password_helper)
@@ -0,0 +1,152 @@
+# FastApi
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+# Third-Party
+import anyio
+
+# Python
+from functools import lru_cache
+import hashlib
+import os
+import re
+
+# Local
+from src.settings.const import VOLUME
+
+
+MEDIA_ROOT = os.path.realpath(VOLUME)
+MEDIA_CACHE = os.path.join(MEDIA_ROOT, "cache")
+# Spooled uploads and resized copies are never served by their own path.
+PRIVATE_DIRS = ("tmp", "cache")
+RESIZE_SIZES = (32, 48, 64, 96, 128, 192, 256, 512)
+DIGEST = re.compile(r"(?:^|/)([0-9a-f]{64})/")
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class UnsatisfiableRange(ValueError):
+    """Requested range lies outside the file."""
+
+
+def resolve_media(path: str) -> str | None:
+    """Absolute path of a public file under the volume, or None."""
+    full = os.path.realpath(os.path.join(MEDIA_ROOT, path))
+    if os.path.commonpath((full, MEDIA_ROOT)) != MEDIA_ROOT:
+        return None
+    relative = os.path.relpath(full, MEDIA_ROOT)
+    if relative.split(os.sep, 1)[0] in PRIVATE_DIRS:
+        return None
+    return full
+
+
+def is_immutable(path: str) -> bool:
+    """Files inside a content-addressed directory never change."""
+    return DIGEST.search(path) is not None
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def media_etag(path: str, stat_result: os.stat_result) -> str:
+    """Strong ETag from the content hash.
+
+    Content-addressed avatars carry the hash in their path, any other
+    file is hashed once per (mtime, size).
+    """
+    match = DIGEST.search(path)
+    if match:
+        return f'"{match.group(1)}-{os.path.basename(path)}"'
+    digest = await anyio.to_thread.run_sync(
+        _file_digest, path, stat_result.st_mtime_ns, stat_result.st_size
+    )
+    return f'"{digest}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    etag = etag.removeprefix("W/")
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Single byte range as (start, end) inclusive.
+
+    None means serve the whole file: no header, a malformed one or a
+    multi-range request, which RFC 9110 lets us ignore.
+    """
+    if not header:
+        return None
+    match = RANGE.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise UnsatisfiableRange(f"bytes */{size}")
+    return start, end
+
+
+class FileRangeResponse(FileResponse):
+    """FileResponse for one byte range of the file, sent as 206."""
+
+    def __init__(
+        self, path: str, start: int, end: int,
+        stat_result: os.stat_result, **kwargs
+    ) -> None:
+        super().__init__(
+            path=path, status_code=206, stat_result=stat_result, **kwargs
+        )
+        self.start, self.end = start, end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = (
+            f"bytes {start}-{end}/{stat_result.st_size}"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": bool(remaining) and bool(chunk),
+                })
+                if not chunk:
+                    break
+
+
+def resized_path(path: str, size: int, etag: str) -> str:
+    """Disk cache location of path scaled to fit size x size.
+
+    Keyed by the content hash from etag, so a file replaced in place
+    gets a fresh copy. The name is kept for the media type.
+    """
+    token = etag.strip('"')
+    return os.path.join(
+        MEDIA_CACHE, str(size), token[:2], token, os.path.basename(path)
+    )
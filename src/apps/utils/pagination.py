@@ -0,0 +1,76 @@
+# Third-Party
+from sqlalchemy import Select, tuple_
+
+# Python
+from typing import Any
+import base64
+import binascii
+import json
+
+
+PAGE_SIZE = 50
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed or was issued for another sort order."""
+
+
+def encode_cursor(sort: str, values: list[Any]) -> str:
+    """Pack the sort mode and the last row key into an opaque token."""
+    raw = json.dumps([sort, *values], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> list[Any]:
+    """Unpack a token made by `encode_cursor` for the given sort mode."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(data, list) or len(data) < 2 or data[0] != sort:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    # Keys are ints, only the relevance rank is a float. The id is last.
+    *keys, pk = data[1:]
+    allowed = (int, float) if sort == "rank" else int
+    if not all(_is_number(value, allowed) for value in keys) or \
+            not _is_number(pk, int):
+        raise InvalidCursor("Invalid cursor")
+    return data[1:]
+
+
+def _is_number(value: Any, types: type | tuple[type, ...]) -> bool:
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def paginate(
+    query: Select, columns: list, sort: str, cursor: str = None,
+    page_number: int = 0, descending: bool = False,
+) -> Select:
+    """Order query by the sort key columns and cut one page.
+
+    With a cursor the page starts right after the encoded row key, so
+    Postgres seeks through the index instead of skipping rows. Without
+    one the old offset mode is used.
+    """
+    if cursor:
+        values = decode_cursor(cursor=cursor, sort=sort)
+        if len(values) != len(columns):
+            raise InvalidCursor("Cursor does not match the requested sort")
+        row, bound = tuple_(*columns), tuple_(*values)
+        query = query.where(row < bound if descending else row > bound)
+    else:
+        query = query.offset(page_number)
+    order = [column.desc() if descending else column.asc()
+             for column in columns]
+    return query.order_by(*order).limit(PAGE_SIZE)
+
+
+def next_cursor(rows: list, attrs: list[str], sort: str) -> str | None:
+    """Cursor for the page after rows, or None when it was the last one."""
+    if len(rows) < PAGE_SIZE:
+        return None
+    last = rows[-1]
+    return encode_cursor(
+        sort=sort, values=[getattr(last, attr) for attr in attrs]
+    )
@@ -0,0 +1,87 @@
+# FastApi
+from fastapi import HTTPException, status
+
+# Third-Party
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+# Python
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+# Local
+from src.settings.const import (
+    PASSWORD_WORKERS, PASSWORD_MAX_PENDING, ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST, ARGON2_PARALLELISM, BCRYPT_ROUNDS,
+)
+
+
+class PasswordPoolBusy(HTTPException):
+    """Too many hashes are queued, the client should retry later."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password checks, try again later",
+            headers={"Retry-After": "1"}
+        )
+
+
+class PasswordPool:
+    """Password hashing on a few dedicated threads.
+
+    argon2 and bcrypt release the GIL while hashing, so threads keep
+    the event loop free. Once max_pending calls are queued or running,
+    new ones fail at once instead of piling up behind a login storm.
+    """
+
+    def __init__(
+        self, helper: PasswordHelper, workers: int, max_pending: int
+    ) -> None:
+        self.helper = helper
+        self.max_pending = max_pending
+        self.pending = 0
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="passwords"
+        )
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            raise PasswordPoolBusy()
+        loop = asyncio.get_running_loop()
+        future = self.pool.submit(func, *args)
+        self.pending += 1
+        # Released when the hash itself is done, not when the request
+        # stops waiting for it, so cancelled requests can't overbook.
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._release)
+        )
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.helper.hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            self.helper.verify_and_update, password, hashed_password
+        )
+
+
+password_helper = PasswordHelper(password_hash=PasswordHash((
+    Argon2Hasher(
+        time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST,
+        parallelism=ARGON2_PARALLELISM
+    ),
+    BcryptHasher(rounds=BCRYPT_ROUNDS),
+)))
+password_pool = PasswordPool(
+    helper=password_helper, workers=PASSWORD_WORKERS,
+    max_pending=PASSWORD_MAX_PENDING
+)
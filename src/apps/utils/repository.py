@@ -0,0 +1,160 @@
+# Third-Party
+from sqlalchemy import (
+    Row, select, insert, update, delete, func, values, column, cast,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+# Python
+from typing import Any
+
+# Local
+from src.apps.models import (
+    Genre, Author, Book, BookGenre, BookReservation, User,
+)
+
+
+class Repository:
+    """Single-statement writes for one model.
+
+    Every method runs one INSERT/UPDATE/DELETE ... RETURNING, so the
+    existence check and the write are the same statement and there is
+    no window between them. A None result means the row wasn't there.
+    """
+
+    def __init__(self, model: type) -> None:
+        self.model = model
+
+    def _returning(self, columns: tuple) -> tuple:
+        return tuple(columns) or (self.model.id,)
+
+    async def create(
+        self, session: AsyncSession, values: dict[str, Any],
+        returning: tuple = ()
+    ) -> Row:
+        stmt = insert(self.model).values(**values).returning(
+            *self._returning(returning)
+        )
+        return (await session.execute(statement=stmt)).one()
+
+    async def create_many(
+        self, session: AsyncSession, rows: list[dict[str, Any]],
+        returning: tuple = ()
+    ) -> list[Row]:
+        """Multi-row INSERT, rows come back in no particular order."""
+        stmt = insert(self.model).values(rows).returning(
+            *self._returning(returning)
+        )
+        return (await session.execute(statement=stmt)).all()
+
+    async def update_many(
+        self, session: AsyncSession, rows: list[dict[str, Any]],
+        returning: tuple = (),
+        previous: tuple[InstrumentedAttribute, ...] = ()
+    ) -> list[Row]:
+        """Update every row by its "id" in one UPDATE ... FROM (VALUES).
+
+        Rows may set different columns, a column a row leaves out keeps
+        its value. Only rows that exist come back.
+        """
+        table = self.model.__table__
+        names = sorted({name for row in rows for name in row} - {"id"})
+        data = values(
+            *(column(name, table.c[name].type) for name in ["id", *names]),
+            name="data"
+        ).data([
+            tuple(row.get(name) for name in ["id", *names]) for row in rows
+        ])
+        stmt = update(self.model).values({
+            name: func.coalesce(
+                cast(data.c[name], table.c[name].type), table.c[name]
+            ) for name in names
+        })
+        returning = self._returning(returning)
+        if previous:
+            old = select(self.model.id, *previous).where(
+                self.model.id.in_([row["id"] for row in rows])
+            ).with_for_update().subquery("old")
+            stmt = stmt.where(
+                self.model.id == old.c.id, old.c.id == data.c.id
+            )
+            returning += tuple(
+                old.c[item.key].label(f"old_{item.key}")
+                for item in previous
+            )
+        else:
+            stmt = stmt.where(self.model.id == data.c.id)
+        stmt = stmt.returning(*returning)
+        return (await session.execute(statement=stmt)).all()
+
+    async def update(
+        self, session: AsyncSession, pk: int, values: dict[str, Any],
+        returning: tuple = (),
+        previous: tuple[InstrumentedAttribute, ...] = (), where: tuple = ()
+    ) -> Row | None:
+        """Update row pk if it also matches `where`.
+
+        Columns in `previous` are returned as they were before the
+        update, labelled old_<name>.
+        """
+        stmt = update(self.model).values(**values)
+        if where:
+            stmt = stmt.where(*where)
+        returning = self._returning(returning)
+        if previous:
+            old = select(self.model.id, *previous).where(
+                self.model.id == pk
+            ).with_for_update().subquery("old")
+            stmt = stmt.where(self.model.id == old.c.id)
+            returning += tuple(
+                old.c[column.key].label(f"old_{column.key}")
+                for column in previous
+            )
+        else:
+            stmt = stmt.where(self.model.id == pk)
+        stmt = stmt.returning(*returning)
+        return (await session.execute(statement=stmt)).first()
+
+    async def delete(
+        self, session: AsyncSession, pk: int, returning: tuple = ()
+    ) -> Row | None:
+        """Delete row pk."""
+        stmt = delete(self.model).where(self.model.id == pk).returning(
+            *self._returning(returning)
+        )
+        return (await session.execute(statement=stmt)).first()
+
+
+class BookRepository(Repository):
+    """Books also keep their primary genre in books_genres."""
+
+    async def create(
+        self, session: AsyncSession, values: dict[str, Any],
+        returning: tuple = ()
+    ) -> Row:
+        """Insert the book and its genre link in one statement."""
+        created = await self.create_many(session=session, rows=[values])
+        return created[0]
+
+    async def create_many(
+        self, session: AsyncSession, rows: list[dict[str, Any]],
+        returning: tuple = ()
+    ) -> list[Row]:
+        """Insert books and their genre links in one statement.
+
+        Returns the new ids, in no particular order.
+        """
+        new = insert(Book).values(rows).returning(
+            Book.id, Book.genre_id
+        ).cte("new")
+        stmt = insert(BookGenre).from_select(
+            ["book_id", "genre_id"], select(new.c.id, new.c.genre_id)
+        ).returning(BookGenre.book_id.label("id"))
+        return (await session.execute(statement=stmt)).all()
+
+
+genre_repository = Repository(model=Genre)
+author_repository = Repository(model=Author)
+book_repository = BookRepository(model=Book)
+user_repository = Repository(model=User)
+reserv_repository = Repository(model=BookReservation)
@@ -0,0 +1,31 @@
+# FastApi
+from fastapi.responses import JSONResponse
+
+# Third-Party
+from pydantic import BaseModel
+import orjson
+
+# Python
+from typing import Any
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain data and schemas with orjson."""
+    return orjson.dumps(content, default=_default)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson.
+
+    Handlers pass dicts built from trusted rows (see rows.py) straight
+    to it, so nothing is validated or walked by jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,144 @@
+# Third-Party
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+# Python
+import asyncio
+import hashlib
+import math
+import time
+
+# Local
+from src.settings.base import AIOREDIS, logger
+from src.settings.const import (
+    REVOCATION_CAPACITY, REVOCATION_ERROR_RATE, REVOCATION_REBUILD,
+)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class TokenRevocation:
+    """Revoked token ids, with a local Bloom filter in front of Redis.
+
+    Revoked jtis live in a sorted set scored by token expiry. Each
+    worker mirrors them into a Bloom filter fed over pub/sub, so most
+    checks end locally; only filter hits ask Redis. Until the filter
+    is loaded every check goes to Redis.
+    """
+
+    def __init__(
+        self, redis: aioredis.Redis, capacity: int, error_rate: float,
+        rebuild: int, key: str = "jwt:revoked",
+        channel: str = "jwt:revoked"
+    ) -> None:
+        self.redis = redis
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild = rebuild
+        self.key = key
+        self.channel = channel
+        self._filter: BloomFilter | None = None
+        self._listener: asyncio.Task | None = None
+
+    async def revoke(self, jti: str, expires: float) -> None:
+        """Revoke jti until its token expires at the given timestamp."""
+        now = time.time()
+        if expires <= now:
+            return
+        if self._filter is not None:
+            self._filter.add(jti)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.key, {jti: expires})
+            pipe.zremrangebyscore(self.key, "-inf", now)
+            pipe.publish(self.channel, jti)
+            await pipe.execute()
+
+    async def is_revoked(self, jti: str) -> bool:
+        """Only a filter miss is trusted without Redis.
+
+        A filter hit, or no filter yet, needs Redis to confirm, and is
+        treated as revoked when Redis can't answer.
+        """
+        if self._filter is not None and jti not in self._filter:
+            return False
+        try:
+            expires = await self.redis.zscore(self.key, jti)
+        except RedisError as e:
+            logger.warning(msg=f"Revocation check failed, rejecting: {e}")
+            return True
+        return expires is not None and expires > time.time()
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        self._filter = None
+
+    async def _load(self) -> BloomFilter:
+        bloom = BloomFilter(
+            capacity=self.capacity, error_rate=self.error_rate
+        )
+        async for jti, _ in self.redis.zscan_iter(self.key, count=1000):
+            bloom.add(jti.decode())
+        return bloom
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    # Subscribe before loading so nothing falls in between.
+                    await pubsub.subscribe(self.channel)
+                    self._filter = await self._load()
+                    loaded = time.monotonic()
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None:
+                            self._filter.add(message["data"].decode())
+                        # Expired jtis can't be removed from the filter.
+                        if time.monotonic() - loaded > self.rebuild:
+                            await self.redis.zremrangebyscore(
+                                self.key, "-inf", time.time()
+                            )
+                            self._filter = await self._load()
+                            loaded = time.monotonic()
+            except RedisError as e:
+                logger.warning(msg=f"Revocation listener failed: {e}")
+                self._filter = None
+                await asyncio.sleep(1)
+
+
+revocation = TokenRevocation(
+    redis=AIOREDIS, capacity=REVOCATION_CAPACITY,
+    error_rate=REVOCATION_ERROR_RATE, rebuild=REVOCATION_REBUILD
+)
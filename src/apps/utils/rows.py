@@ -0,0 +1,66 @@
+# Local
+from src.apps.models import (
+    Author, Genre, Book, User, BookReservation, BookListing,
+)
+
+
+# Each function returns what the named schema would dump, without
+# building and validating a model per row. Only for rows read from the
+# database, request data still goes through the schemas.
+
+
+def genre_row(item: Genre) -> dict:
+    """GenreSchema."""
+    return {"id": item.id, "title": item.title}
+
+
+def author_row(item: Author) -> dict:
+    """AuthorSchema."""
+    return {
+        "id": item.id, "first_name": item.first_name,
+        "last_name": item.last_name, "avatar": item.avatar,
+    }
+
+
+def listing_row(item: BookListing) -> dict:
+    """BookSchema, from the book_listing projection."""
+    return {
+        "id": item.book_id, "title": item.title, "price": item.price,
+        "pages": item.pages, "author": {
+            "id": item.author_id, "first_name": item.author_first_name,
+            "last_name": item.author_last_name, "avatar": item.author_avatar,
+        },
+        "genre": [
+            {"id": genre_id, "title": title}
+            for genre_id, title in zip(item.genre_ids, item.genre_titles)
+        ],
+    }
+
+
+def zip_book_row(item: Book) -> dict:
+    """ZipBookSchema."""
+    return {
+        "id": item.id, "title": item.title, "price": item.price,
+        "pages": item.pages, "author_id": item.author_id,
+        "genre_id": item.genre_id,
+    }
+
+
+def user_row(item: User) -> dict:
+    """UserRead."""
+    return {
+        "id": item.id, "email": item.email, "is_active": item.is_active,
+        "is_superuser": item.is_superuser, "is_verified": item.is_verified,
+        "first_name": item.first_name, "last_name": item.last_name,
+        "avatar": item.avatar,
+    }
+
+
+def reserv_row(item: BookReservation) -> dict:
+    """GetReservationSchema, needs user and book loaded."""
+    return {
+        "id": item.id, "begin_date": item.begin_date,
+        "end_date": item.end_date, "on_hands": item.on_hands,
+        "is_returned": item.is_returned, "user": user_row(item=item.user),
+        "book": zip_book_row(item=item.book),
+    }
@@ -1,36 +1,86 @@
 # Third-Party
-import asyncio
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_
 
 # Python
 from datetime import datetime, timezone
+import time
 
 # Local
-from src.settings.base import celery, session, logger
+from src.settings.base import celery, logger
+from src.settings.const import (
+    EXPIRY_BATCH_SIZE, AVATAR_GC_BATCH_SIZE, AVATAR_GC_GRACE,
+)
 from src.apps.models.reserv import BookReservation
+from .worker import runtime, run_async
+from .expiry import expire_due, cancel_expiry
+from .avatars import collect_avatars
+from .uploads import sweep_uploads
+
+
+EXPIRE_CHUNK_SIZE = 5000
 
 
 @celery.task(name="reset-reservations")
 def main():
-    asyncio.run(check_db())
+    return run_async(check_db())
+
+
+@celery.task(name="expire-due-reservations", ignore_result=True)
+def poll_expiry():
+    return run_async(poll_due())
+
+
+@celery.task(name="collect-avatars", ignore_result=True)
+def collect_garbage():
+    removed = run_async(collect_blobs())
+    swept = sweep_uploads(max_age=AVATAR_GC_GRACE)
+    logger.info(msg=f"Removed {removed} avatars and {swept} stale uploads")
+
+
+async def poll_due():
+    # The runtime may only start inside run_async, so read it here.
+    return await expire_due(
+        redis=runtime.redis, session=runtime.session,
+        batch_size=EXPIRY_BATCH_SIZE
+    )
+
+
+async def collect_blobs():
+    return await collect_avatars(
+        session=runtime.session, batch_size=AVATAR_GC_BATCH_SIZE,
+        grace=AVATAR_GC_GRACE
+    )
 
 
 async def check_db():
-    now = datetime.now(tz=timezone.utc)
-    query = select(BookReservation).where(and_(
-        BookReservation.end_date <= now.date(),
+    """Finish every expired reservation, one chunk per transaction."""
+    started = time.monotonic()
+    today = datetime.now(tz=timezone.utc).date()
+    due = select(BookReservation.id).where(and_(
+        BookReservation.end_date <= today,
         BookReservation.is_returned == False
-    ))
-    async with session() as conn:
-        result = await conn.execute(query)
-        reservations = result.scalars().all()
-        logger.info(msg=f"Found {len(reservations)} reservations!")
-        
-        for reservation in reservations:
-            reservation.is_returned = True
-            await conn.add(reservation)
-            logger.info(msg=f"Reservation {reservation.id} is finished!")
-        
-        await conn.commit()
-        
-    return None
+    )).order_by(
+        BookReservation.id
+    ).limit(EXPIRE_CHUNK_SIZE).with_for_update(skip_locked=True).cte("due")
+    stmt = update(BookReservation).where(
+        BookReservation.id == due.c.id
+    ).values(is_returned=True, on_hands=False).returning(BookReservation.id)
+
+    total = chunks = 0
+    while True:
+        async with runtime.session() as conn:
+            result = await conn.execute(statement=stmt)
+            ids = result.scalars().all()
+            await conn.commit()
+        await cancel_expiry(runtime.redis, *ids)
+        count = len(ids)
+        total += count
+        chunks += 1
+        if count < EXPIRE_CHUNK_SIZE:
+            break
+
+    logger.info(
+        msg=f"Finished {total} reservations in {chunks} chunks "
+        f"({time.monotonic() - started:.2f}s)"
+    )
+    return total
@@ -0,0 +1,251 @@
+# FastApi
+from fastapi import Request, Response, UploadFile, status
+from fastapi.routing import APIRoute
+
+# Third-Party
+from starlette.datastructures import FormData, Headers
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.types import Receive, Scope
+
+# Python
+from typing import AsyncGenerator, Callable
+import hashlib
+import os
+import tempfile
+import time
+
+# Local
+from src.settings.const import VOLUME, MAX_UPLOAD_SIZE
+from src.apps.schemas.response import ErrorSchema
+from .responses import ORJSONResponse
+
+
+UPLOADS_TMP = os.path.join(VOLUME, "tmp")
+SNIFF_SIZE = 16
+# Room for the text fields and the multipart framing around the file.
+FORM_OVERHEAD = 64 * 1024
+
+
+class InvalidUpload(ValueError):
+    """Upload was rejected before being processed."""
+
+
+class UploadTooLarge(InvalidUpload):
+    """Upload is over the size limit."""
+
+
+class SpooledUpload(UploadFile):
+    """File part written straight to a named temp file on the volume.
+
+    Every write is hashed and checked against max_size, and the first
+    SNIFF_SIZE bytes against sniff, so the part is validated while it
+    streams in and handed on by path without another copy.
+    """
+
+    def __init__(
+        self, filename: str | None, headers: Headers,
+        sniff: Callable[[bytes], bool], max_size: int
+    ) -> None:
+        os.makedirs(UPLOADS_TMP, exist_ok=True)
+        handle = tempfile.NamedTemporaryFile(dir=UPLOADS_TMP, delete=False)
+        super().__init__(
+            file=handle, size=0, filename=filename, headers=headers
+        )
+        self.path = handle.name
+        self.sniff = sniff
+        self.max_size = max_size
+        self.claimed = False
+        self._digest = hashlib.sha256()
+        # Leading bytes until they are sniffed, None afterwards.
+        self._head: bytes | None = b""
+
+    async def write(self, data: bytes) -> None:
+        if self.size + len(data) > self.max_size:
+            raise UploadTooLarge(f"File is larger than {self.max_size} bytes")
+        if self._head is not None:
+            self._head += data[:SNIFF_SIZE]
+            if len(self._head) >= SNIFF_SIZE:
+                self._check_head()
+        self._digest.update(data)
+        await super().write(data)
+
+    def claim(self) -> tuple[str, str]:
+        """Return the path and SHA-256 hex digest, the caller owns the
+        file afterwards."""
+        if self.size == 0:
+            raise InvalidUpload("File is empty")
+        if self._head is not None:
+            self._check_head()
+        self.file.flush()
+        self.claimed = True
+        return self.path, self._digest.hexdigest()
+
+    def _check_head(self) -> None:
+        if not self.sniff(self._head):
+            raise InvalidUpload("File type is not allowed")
+        self._head = None
+
+
+class SpoolingParser(MultiPartParser):
+    """Starlette's multipart parser with file parts in SpooledUpload."""
+
+    def __init__(
+        self, headers: Headers, stream: AsyncGenerator[bytes, None],
+        sniff: Callable[[bytes], bool], max_size: int
+    ) -> None:
+        super().__init__(headers=headers, stream=stream)
+        self.sniff = sniff
+        self.max_size = max_size
+        self.uploads: list[SpooledUpload] = []
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        part = self._current_part
+        if part.file is None:
+            return
+        # Swap the in-memory spool Starlette made for one on the volume.
+        part.file.file.close()
+        self._files_to_close_on_error.remove(part.file.file)
+        part.file = SpooledUpload(
+            filename=part.file.filename, headers=part.file.headers,
+            sniff=self.sniff, max_size=self.max_size
+        )
+        self.uploads.append(part.file)
+
+
+class UploadRequest(Request):
+    """Request whose body may not grow past max_size plus FORM_OVERHEAD
+    and whose multipart files are spooled by SpoolingParser."""
+
+    def __init__(
+        self, scope: Scope, receive: Receive,
+        sniff: Callable[[bytes], bool], max_size: int
+    ) -> None:
+        super().__init__(scope=scope, receive=receive)
+        self.sniff = sniff
+        self.max_size = max_size
+        self.uploads: list[SpooledUpload] = []
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        received = 0
+        async for chunk in super().stream():
+            received += len(chunk)
+            if received > self.max_size + FORM_OVERHEAD:
+                raise UploadTooLarge(
+                    f"Request is larger than {self.max_size} bytes"
+                )
+            yield chunk
+
+    async def _get_form(self, **kwargs) -> FormData:
+        content_type = self.headers.get("content-type", "")
+        if self._form is not None or \
+                not content_type.startswith("multipart/form-data"):
+            return await super()._get_form(**kwargs)
+        parser = SpoolingParser(
+            headers=self.headers, stream=self.stream(), sniff=self.sniff,
+            max_size=self.max_size
+        )
+        # Tracked before parsing, so a rejected body leaves nothing.
+        self.uploads = parser.uploads
+        try:
+            self._form = await parser.parse()
+        except MultiPartException as e:
+            raise InvalidUpload(e.message)
+        return self._form
+
+    def discard_unclaimed(self) -> None:
+        for upload in self.uploads:
+            if not upload.claimed:
+                upload.file.close()
+                discard_upload(path=upload.path)
+
+
+class UploadRoute(APIRoute):
+    """Route whose file uploads stream straight to the volume.
+
+    A body announced or grown past max_size plus FORM_OVERHEAD is
+    refused before Starlette buffers it, and each file is hashed,
+    sniffed and size checked as it is written, once. Endpoints take
+    the files they keep with `claim_upload`, the rest are removed when
+    the endpoint returns.
+    """
+
+    max_size: int = MAX_UPLOAD_SIZE
+
+    @staticmethod
+    def sniff(head: bytes) -> bool:
+        """Whether a file starting with head is accepted."""
+        return True
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and \
+                    int(length) > self.max_size + FORM_OVERHEAD:
+                return self._reject(
+                    UploadTooLarge(
+                        f"Request is larger than {self.max_size} bytes"
+                    )
+                )
+            request = UploadRequest(
+                scope=request.scope, receive=request.receive,
+                sniff=self.sniff, max_size=self.max_size
+            )
+            try:
+                # Parsed here, FastAPI would turn any error into a 400.
+                await request.form()
+            except InvalidUpload as e:
+                request.discard_unclaimed()
+                return self._reject(e)
+            try:
+                return await handler(request)
+            finally:
+                request.discard_unclaimed()
+
+        return route_handler
+
+    @staticmethod
+    def _reject(error: InvalidUpload) -> Response:
+        if isinstance(error, UploadTooLarge):
+            status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        else:
+            status_code = status.HTTP_400_BAD_REQUEST
+        return ORJSONResponse(
+            content=ErrorSchema(error=str(error)), status_code=status_code
+        )
+
+
+def claim_upload(upload: UploadFile) -> tuple[str, str]:
+    """Take a file spooled by UploadRoute, return its path and digest."""
+    if not isinstance(upload, SpooledUpload):
+        raise TypeError("Uploads must come through an UploadRoute")
+    return upload.claim()
+
+
+def discard_upload(path: str | None) -> None:
+    """Remove a spooled upload that won't be processed."""
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def sweep_uploads(max_age: int) -> int:
+    """Remove spooled uploads left behind for longer than max_age seconds."""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(UPLOADS_TMP))
+    except FileNotFoundError:
+        return removed
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
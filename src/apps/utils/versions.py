@@ -0,0 +1,105 @@
+# FastApi
+from fastapi import Request, Response, status
+
+# Third-Party
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+# Python
+import hashlib
+import json
+import secrets
+
+# Local
+from src.settings.base import AIOREDIS, logger
+from .media import etag_matches
+
+
+class CatalogVersions:
+    """Redis counters bumped on every write to an entity type.
+
+    Listings are tagged with a weak ETag built from the versions they
+    depend on and their query, so a client whose ETag is still current
+    gets a 304 before Postgres or the listing cache are touched. A
+    cached listing keeps the versions it was built at, so writes that
+    don't drop it leave its ETag unchanged.
+    Versions only grow; the counters never expire. A random epoch is
+    part of every ETag, so if Redis loses the counters and they start
+    over, old ETags can't match the new numbers.
+    """
+
+    def __init__(self, redis: aioredis.Redis, prefix: str = "version") -> None:
+        self.redis = redis
+        self.prefix = prefix
+
+    def key(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}"
+
+    async def bump(self, *kinds: str) -> None:
+        """Call after the commit, before invalidating the listing cache."""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for kind in kinds:
+                    pipe.incr(self.key(kind=kind))
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(msg=f"Version bump of {kinds} failed: {e}")
+
+    def keys(self, kinds: tuple[str, ...]) -> list[str]:
+        """Keys of the epoch and of kinds, in the order `token` takes."""
+        return [
+            self.key(kind="epoch"), *(self.key(kind=kind) for kind in kinds)
+        ]
+
+    @staticmethod
+    def token(values: list[bytes | None]) -> str | None:
+        """Versions read from `keys` as one token, None without an epoch."""
+        if values[0] is None:
+            return None
+        return ".".join((value or b"0").decode() for value in values)
+
+    async def read(self, kinds: tuple[str, ...]) -> str | None:
+        """Current versions of kinds as one token, None when unreadable."""
+        keys = self.keys(kinds=kinds)
+        try:
+            values = await self.redis.mget(keys)
+            if values[0] is None:
+                await self.redis.set(keys[0], secrets.token_hex(4), nx=True)
+        except RedisError as e:
+            logger.warning(msg=f"Version read of {kinds} failed: {e}")
+            return None
+        return self.token(values=values)
+
+    @staticmethod
+    def etag(version: str | None, params: dict) -> str | None:
+        """Weak ETag for a listing at version."""
+        if version is None:
+            return None
+        normalized = {
+            key: value for key, value in params.items() if value is not None
+        }
+        raw = json.dumps(
+            normalized, sort_keys=True, separators=(",", ":"), default=str
+        )
+        digest = hashlib.sha1(raw.encode()).hexdigest()[:16]
+        return f'W/"{version}-{digest}"'
+
+
+def etag_headers(etag: str | None) -> dict[str, str]:
+    """Let clients store listings but revalidate them on every use."""
+    if etag is None:
+        return {}
+    return {"etag": etag, "cache-control": "no-cache"}
+
+
+def not_modified(request: Request, etag: str | None) -> Response | None:
+    """304 response when If-None-Match still matches etag."""
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=etag_headers(etag=etag)
+        )
+    return None
+
+
+catalog_versions = CatalogVersions(redis=AIOREDIS)
@@ -0,0 +1,79 @@
+# Third-Party
+from celery.signals import worker_process_init, worker_process_shutdown
+from redis import asyncio as aioredis
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, create_async_engine, async_sessionmaker,
+)
+
+# Python
+from typing import Any, Coroutine, TypeVar
+import asyncio
+
+# Local
+from src.settings.base import logger
+from src.settings.const import DB_URL, REDIS_URL
+
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """Event loop, engine and Redis client owned by one worker process.
+
+    Pooled connections are bound to the loop that opened them, so each
+    prefork child keeps a single loop alive for its whole life and runs
+    every async task on it. Tasks run one at a time per process, which
+    is what the prefork and solo pools guarantee.
+    """
+
+    def __init__(self) -> None:
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.engine: AsyncEngine | None = None
+        self.session: async_sessionmaker | None = None
+        self.redis: aioredis.Redis | None = None
+
+    def start(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.engine = create_async_engine(
+            url=DB_URL, pool_size=2, max_overflow=2, pool_pre_ping=True
+        )
+        self.session = async_sessionmaker(
+            bind=self.engine, expire_on_commit=False
+        )
+        self.redis = aioredis.Redis.from_url(url=REDIS_URL)
+        logger.info(msg="Worker runtime started")
+
+    def stop(self) -> None:
+        if self.loop is None:
+            return
+        self.loop.run_until_complete(self.engine.dispose())
+        self.loop.run_until_complete(self.redis.aclose())
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+        self.loop = self.engine = self.session = self.redis = None
+        logger.info(msg="Worker runtime stopped")
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run coro to completion on the process loop."""
+        if self.loop is None:
+            # The solo pool and `task.apply()` skip worker_process_init.
+            self.start()
+        return self.loop.run_until_complete(coro)
+
+
+runtime = WorkerRuntime()
+
+
+@worker_process_init.connect
+def start_runtime(**kwargs) -> None:
+    runtime.start()
+
+
+@worker_process_shutdown.connect
+def stop_runtime(**kwargs) -> None:
+    runtime.stop()
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    return runtime.run(coro)
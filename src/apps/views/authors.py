@@ -1,24 +1,33 @@
 # FastApi
 from fastapi import (
-    Depends, APIRouter, Response, status, Form, UploadFile, File
+    Depends, APIRouter, Request, Response, status, Form, UploadFile, File
 )
 
 # Thirt-Party
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, insert
-from PIL import Image
+from sqlalchemy import select
 
 # Python
 from typing import Annotated, Optional
-import os
-import io
+from functools import partial
 
 # Local
-from src.settings.const import VOLUME
 from src.apps.utils.session import get_async_session
+from src.apps.utils.pagination import paginate, next_cursor, InvalidCursor
+from src.apps.utils.cache import listing_cache
+from src.apps.utils.versions import (
+    catalog_versions, etag_headers, not_modified,
+)
+from src.apps.utils.rows import author_row
+from src.apps.utils.repository import author_repository
+from src.apps.utils.images import (
+    ImageUploadRoute, image_pipeline, accept_image
+)
+from src.apps.utils.avatars import avatar_dir
+from src.apps.utils.uploads import InvalidUpload, discard_upload
 from src.apps.models.authors import Author
 from src.apps.schemas.authors import (
-    AuthorSchema, AllAuthorsSchema, CreateAuthorSchema,
+    AllAuthorsSchema, CreateAuthorSchema,
 )
 from src.apps.schemas.response import ResponseSchema, ErrorSchema
 
@@ -33,26 +42,35 @@ class Authors:
         )
         self.router.add_api_route(
             path=self.path, endpoint=self.create_author, 
-            methods=["POST"], responses={
+            methods=["POST"], route_class_override=ImageUploadRoute,
+            responses={
                 200: {"model": ResponseSchema},
-                400: {"model": ErrorSchema}
+                400: {"model": ErrorSchema},
+                413: {"model": ErrorSchema}
             }
         )
         self.router.add_api_route(
             path=self.path, endpoint=self.get_all_authors, 
             description="""Get all authors with pagination,
-            pages begining by 0""",
+            pages begining by 0. Pass `next_cursor` from the previous
+            response as `cursor` to page by key instead of offset.
+            Send the `ETag` back in `If-None-Match` to get 304 while
+            nothing has changed""",
             methods=["GET"], responses={
                 200: {"model": AllAuthorsSchema},
-                204: {"model": None}
+                204: {"model": None},
+                304: {"model": None},
+                400: {"model": ErrorSchema}
             }
         )
         self.router.add_api_route(
             path=self.path+"/{author_id}", endpoint=self.update_author, 
-            methods=["PUT"], responses={
+            methods=["PUT"], route_class_override=ImageUploadRoute,
+            responses={
                 200: {"model": ResponseSchema},
                 400: {"model": ErrorSchema},
-                404: {"model": None}
+                404: {"model": None},
+                413: {"model": ErrorSchema}
             }
         )
         self.router.add_api_route(
@@ -68,40 +86,80 @@ class Authors:
         last_name: Annotated[str, Form()], avatar: UploadFile = None,
         session: AsyncSession = Depends(get_async_session)
     ):
+        image, avatar_path = None, None
         try:
+            if avatar:
+                image, digest = await accept_image(upload=avatar)
+                avatar_path = avatar_dir(digest=digest)
             data = CreateAuthorSchema(
-                first_name=first_name, last_name=last_name, avatar=avatar
+                first_name=first_name, last_name=last_name,
+                avatar=avatar_path
             )
-            query = insert(Author).values(
-                first_name=data.first_name, last_name=data.last_name,
-                avatar=data.avatar
+            await author_repository.create(
+                session=session, values=data.model_dump()
             )
-            await session.execute(query)
             await session.commit()
+            if image:
+                image_pipeline.queue(path=image, target_dir=avatar_path)
+            await catalog_versions.bump("authors")
+            await listing_cache.invalidate("authors")
             return ResponseSchema(
                 response=f"Author {data.first_name} {data.last_name} is created!"
             )
         except Exception as e:
+            discard_upload(path=image)
             response.status_code = status.HTTP_400_BAD_REQUEST
             return ErrorSchema(error=str(e))
 
     async def get_all_authors(
-        self, page_number: int = 0, 
+        self, request: Request, response: Response, page_number: int = 0,
+        cursor: str = None,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(Author).limit(50).offset(page_number)
+        try:
+            query = paginate(
+                query=select(Author), columns=[Author.id], sort="id",
+                cursor=cursor, page_number=page_number
+            )
+        except InvalidCursor as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        params = {"page_number": page_number, "cursor": cursor}
+        version = await catalog_versions.read(kinds=("authors",))
+        etag = catalog_versions.etag(version=version, params=params)
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        body, version = await listing_cache.fetch(
+            namespace="authors", params=params, kinds=("authors",),
+            conn=session, loader=partial(self._load_authors, query=query)
+        )
+        etag = catalog_versions.etag(version=version, params=params)
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        headers = etag_headers(etag=etag)
+        if body is None:
+            return Response(
+                status_code=status.HTTP_204_NO_CONTENT, headers=headers
+            )
+        return Response(
+            content=body, media_type="application/json", headers=headers
+        )
+
+    @staticmethod
+    async def _load_authors(
+        session: AsyncSession, query
+    ) -> tuple[dict | None, list[str]]:
+        """AllAuthorsSchema body."""
         temp = await session.execute(query)
         data = temp.scalars().all()
         if not data:
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-        obj = []
-        for item in data:
-            obj.append(AuthorSchema(
-                id=item.id, first_name=item.first_name, 
-                last_name=item.last_name, avatar=item.avatar
-            ))
-        result = AllAuthorsSchema(response=obj)
-        return result
+            return None, ["authors"]
+        result = {
+            "response": [author_row(item=item) for item in data],
+            "next_cursor": next_cursor(rows=data, attrs=["id"], sort="id")
+        }
+        tags = ["authors", *(f"author:{item.id}" for item in data)]
+        return result, tags
     
     async def update_author(
         self, author_id: int, response: Response,
@@ -110,52 +168,58 @@ class Authors:
         avatar: Optional[UploadFile] = File(None), 
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(Author).where(Author.id == author_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
-        if data:
-            update_values = {}
-            if first_name:
-                update_values['first_name'] = first_name
-            if last_name:
-                update_values['last_name'] = last_name
-            if avatar:
-                image = Image.open(io.BytesIO(await avatar.read()))
-                name = os.urandom(32).hex()
-                avatar_filename = f"authors/{name}"
-                avatar_path = os.path.join(VOLUME, avatar_filename)
-                os.makedirs(os.path.dirname(avatar_path), exist_ok=True)
-                update_values['avatar'] = avatar_path
-                image.save(avatar_path)
-            if not update_values:
-                response.status_code = status.HTTP_400_BAD_REQUEST
-                return ErrorSchema(error="No fields to update")
-
+        update_values = {}
+        if first_name:
+            update_values['first_name'] = first_name
+        if last_name:
+            update_values['last_name'] = last_name
+        image = None
+        if avatar:
             try:
-                stmt = update(Author).where(
-                    Author.id == author_id
-                ).values(**update_values)
-                await session.execute(statement=stmt)
-                await session.commit()
-                return ResponseSchema(
-                    response=f"Author {author_id} is updated!"
-                )
-            except Exception as e:
+                image, digest = await accept_image(upload=avatar)
+            except InvalidUpload as e:
                 response.status_code = status.HTTP_400_BAD_REQUEST
                 return ErrorSchema(error=str(e))
-        return Response(status_code=status.HTTP_404_NOT_FOUND)
+            update_values['avatar'] = avatar_dir(digest=digest)
+        if not update_values:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="No fields to update")
+
+        try:
+            data = await author_repository.update(
+                session=session, pk=author_id, values=update_values
+            )
+            await session.commit()
+        except Exception as e:
+            discard_upload(path=image)
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        if data is None:
+            discard_upload(path=image)
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        if image:
+            image_pipeline.queue(
+                path=image, target_dir=update_values['avatar']
+            )
+        tags = [f"author:{author_id}"]
+        if first_name or last_name:
+            # Book listings filtered by name that didn't match before.
+            tags.append("books")
+        await catalog_versions.bump("authors")
+        await listing_cache.invalidate(*tags)
+        return ResponseSchema(
+            response=f"Author {author_id} is updated!"
+        )
 
     async def remove_author(
         self, author_id: int,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(Author).where(Author.id == author_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
+        data = await author_repository.delete(session=session, pk=author_id)
         if data:
-            stmt = delete(Author).where(Author.id == author_id)
-            await session.execute(statement=stmt)
             await session.commit()
+            await catalog_versions.bump("authors", "books")
+            await listing_cache.invalidate("authors", "books")
             return ResponseSchema(
                 response=f"Author {author_id} is removed!"
             )
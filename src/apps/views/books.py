@@ -1,23 +1,51 @@
 # FastApi
-from fastapi import Depends, APIRouter, Response, status
+from fastapi import (
+    Depends, APIRouter, Request, Response, status, Query, Form,
+    UploadFile, File,
+)
+from fastapi.responses import StreamingResponse
 
 # Thirt-Party
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, insert, asc, desc
+from sqlalchemy import (
+    select, delete, and_, func, cast, literal, tuple_, BigInteger, Double,
+)
+from sqlalchemy.orm import with_expression
+from sqlalchemy.dialects.postgresql import (
+    REGCONFIG, ARRAY, array, insert as pg_insert,
+)
 
 # Python
 from typing import Literal
+from functools import partial
+import os
 
 # Local
+from src.settings.const import VOLUME
 from src.apps.utils.session import get_async_session
+from src.apps.utils.pagination import paginate, next_cursor, InvalidCursor
+from src.apps.utils.cache import listing_cache
+from src.apps.utils.versions import (
+    catalog_versions, etag_headers, not_modified,
+)
+from src.apps.utils.rows import listing_row
+from src.apps.utils.responses import ORJSONResponse
+from src.apps.utils.repository import book_repository
+from src.apps.utils import bulk_import
+from src.apps.utils.export import export_query, stream_books
 from src.apps.models.books import Book
+from src.apps.models.listing import BookListing
 from src.apps.models.many_to_many import BookGenre
 from src.apps.schemas.response import ResponseSchema, ErrorSchema
 from src.apps.schemas.books import (
-    BookSchema, CreateBookSchema, AllBooksSchema, UpdateBookSchema,
+    CreateBookSchema, AllBooksSchema, UpdateBookSchema,
+    ImportResultSchema, BatchBooksSchema, BatchCreateBooksSchema,
+    BatchUpdateBooksSchema, BatchResultSchema, MAX_BATCH,
 )
-from src.apps.schemas.authors import AuthorSchema
-from src.apps.schemas.genres import GenreSchema
+
+
+# Book rows embed their author and genres.
+CATALOG = ("books", "authors", "genres")
 
 
 class Books:
@@ -35,16 +63,92 @@ class Books:
                 400: {"model": ErrorSchema}
             }
         )
+        self.router.add_api_route(
+            path=self.path+"/import", endpoint=self.import_books,
+            description="""
+            Массовая загрузка книг из NDJSON или CSV с колонками
+            title, price, pages, first_name, last_name, genre.
+            Файл передается в `file` или путем внутри тома в `path`.
+            Недостающие авторы и жанры создаются, книги с уже
+            существующим названием обновляются.""",
+            methods=["POST"], responses={
+                200: {"model": ImportResultSchema},
+                400: {"model": ErrorSchema}
+            }
+        )
         self.router.add_api_route(
             path=self.path, endpoint=self.get_all_books, 
             description="""
             Эндпоинт возвращает все книги с сортировкой по 
-            цене и с пагинацией. Пагинация начинается с нуля.""",
+            цене и с пагинацией. Пагинация начинается с нуля.
+            Фильтры: диапазоны цены и страниц, авторы `author_ids`,
+            жанры `genre_ids` (любой из них или все сразу через
+            `genre_match`).
+            Для пагинации по ключу передайте `next_cursor` из
+            предыдущего ответа в параметр `cursor`.
+            Верните `ETag` в `If-None-Match`, чтобы получить 304,
+            пока каталог не изменился.""",
+            methods=["GET"], responses={
+                200: {"model": AllBooksSchema},
+                304: {"model": None},
+                400: {"model": ErrorSchema},
+                404: {"model": None}
+            }
+        )
+        self.router.add_api_route(
+            path=self.path+"/export", endpoint=self.export_books,
+            description="""
+            Потоковая выгрузка каталога в NDJSON или CSV. Принимает
+            те же фильтры, что и список книг.""",
+            methods=["GET"], response_class=StreamingResponse,
+            responses={200: {"content": {
+                "application/x-ndjson": {}, "text/csv": {}
+            }}}
+        )
+        self.router.add_api_route(
+            path=self.path+"/search", endpoint=self.search_books,
+            description="""
+            Полнотекстовый поиск по названию книги и имени автора
+            с учетом опечаток. Результаты отсортированы по
+            релевантности, пагинация через `cursor`. Поддерживает
+            `If-None-Match`, как и список книг.""",
             methods=["GET"], responses={
                 200: {"model": AllBooksSchema},
+                304: {"model": None},
+                400: {"model": ErrorSchema},
                 404: {"model": None}
             }
         )
+        self.router.add_api_route(
+            path=self.path+"/batch", endpoint=self.get_books_batch,
+            description=f"""
+            Книги по списку `ids` (до {MAX_BATCH}) одним запросом,
+            в порядке переданных id. Ненайденные id в `missing`.""",
+            methods=["GET"], responses={
+                200: {"model": BatchBooksSchema},
+                400: {"model": ErrorSchema}
+            }
+        )
+        self.router.add_api_route(
+            path=self.path+"/batch", endpoint=self.add_books_batch,
+            description=f"""
+            Создание до {MAX_BATCH} книг в одной транзакции.""",
+            methods=["POST"], responses={
+                200: {"model": BatchResultSchema},
+                400: {"model": ErrorSchema}
+            }
+        )
+        self.router.add_api_route(
+            path=self.path+"/batch", endpoint=self.update_books_batch,
+            description=f"""
+            Изменение до {MAX_BATCH} книг одним запросом, например
+            переоценка. Каждая книга передает `id` и только
+            изменяемые поля. Ненайденные id в `missing`.""",
+            methods=["PATCH"], responses={
+                200: {"model": BatchResultSchema},
+                400: {"model": ErrorSchema}
+            }
+        )
         self.router.add_api_route(
             path=self.path+"/{book_id}", endpoint=self.remove_book,
             methods=["DELETE"], responses={
@@ -66,22 +170,14 @@ class Books:
         session: AsyncSession = Depends(get_async_session)
     ):
         try:
-            stmt = insert(Book).values(
-                title=obj.title, price=obj.price, pages=obj.pages,
-                author_id=obj.author_id, genre_id=obj.genre_id
+            await book_repository.create(
+                session=session, values=obj.model_dump()
             )
-            await session.execute(statement=stmt)
-            book_query = select(Book).where(Book.title == obj.title)
-            result = await session.execute(book_query)
-            book = result.scalar_one_or_none()
-
-            if book:
-                stmt = insert(BookGenre).values(
-                    book_id=book.id, 
-                    genre_id=obj.genre_id
-                )
-                await session.execute(statement=stmt)
             await session.commit()
+            await catalog_versions.bump("books")
+            await listing_cache.invalidate(
+                "books:all", f"books:genre:{obj.genre_id}"
+            )
             return ResponseSchema(
                 response=f"Book {obj.title} is created!"
             )
@@ -89,67 +185,369 @@ class Books:
             response.status_code = status.HTTP_400_BAD_REQUEST
             return ErrorSchema(error=str(e))
 
+    async def import_books(
+        self, response: Response, file: UploadFile = File(None),
+        path: str = Form(None),
+        file_format: Literal["ndjson", "csv"] = Form(None),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        if file:
+            name = file.filename or ""
+        elif path:
+            volume = os.path.realpath(VOLUME)
+            name = os.path.realpath(os.path.join(volume, path))
+            if not name.startswith(volume + os.sep) or \
+                    not os.path.isfile(name):
+                response.status_code = status.HTTP_400_BAD_REQUEST
+                return ErrorSchema(error=f"File {path} not found in volume")
+        else:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="Pass a file or a path")
+        if not file_format:
+            extension = os.path.splitext(name)[1].lower()
+            file_format = {
+                ".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"
+            }.get(extension)
+        if not file_format:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="Can't detect format, pass file_format")
+        try:
+            if file:
+                result = await bulk_import.import_books(
+                    session=session, stream=file.file,
+                    file_format=file_format
+                )
+            else:
+                with open(name, "rb") as stream:
+                    result = await bulk_import.import_books(
+                        session=session, stream=stream,
+                        file_format=file_format
+                    )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        await catalog_versions.bump(*CATALOG)
+        await listing_cache.invalidate("books", "authors", "genres")
+        return result
+
     async def get_all_books(
-        self, sort_by_price: Literal["asc", "desc"] = None, 
-        page_number: int = 0, genre_id: int = None, 
+        self, request: Request, response: Response,
+        sort_by_price: Literal["asc", "desc"] = None, 
+        page_number: int = 0, cursor: str = None, genre_id: int = None, 
+        genre_ids: list[int] = Query(None),
+        genre_match: Literal["any", "all"] = "any",
+        author_ids: list[int] = Query(None),
+        min_price: int = None, max_price: int = None,
+        min_pages: int = None, max_pages: int = None,
         first_name: str = None, last_name: str = None,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(Book)
-
-        conditions = []
-        if genre_id:
-            conditions.append(Book.genre_id == genre_id)
-        if first_name:
-            conditions.append(Book.author.has(first_name=first_name))
-        if last_name:
-            conditions.append(Book.author.has(last_name=last_name))
+        query = select(BookListing)
 
+        genre_ids = sorted(set(genre_ids or []) | ({genre_id} - {None, 0}))
+        author_ids = sorted(set(author_ids or []))
+        conditions = self._conditions(
+            genre_ids=genre_ids, genre_match=genre_match,
+            author_ids=author_ids, min_price=min_price,
+            max_price=max_price, min_pages=min_pages, max_pages=max_pages,
+            first_name=first_name, last_name=last_name
+        )
         if len(conditions) > 1:
             query = query.where(and_(*conditions))
         elif len(conditions) == 1:
             query = query.where(conditions[0])
 
         if sort_by_price:
-            query = query.order_by(asc(
-                Book.price
-            ) if sort_by_price == "asc" else desc(Book.price))
+            sort = f"price_{sort_by_price}"
+            columns = [BookListing.price, BookListing.book_id]
+            attrs = ["price", "book_id"]
+        else:
+            sort = "id"
+            columns, attrs = [BookListing.book_id], ["book_id"]
+        try:
+            query = paginate(
+                query=query, columns=columns, sort=sort, cursor=cursor,
+                page_number=page_number,
+                descending=sort_by_price == "desc"
+            )
+        except InvalidCursor as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        params = {
+            "sort_by_price": sort_by_price, "page_number": page_number,
+            "cursor": cursor, "genre_ids": genre_ids or None,
+            "genre_match": genre_match if genre_ids else None,
+            "author_ids": author_ids or None,
+            "min_price": min_price, "max_price": max_price,
+            "min_pages": min_pages, "max_pages": max_pages,
+            "first_name": first_name, "last_name": last_name,
+        }
+        if genre_ids:
+            scopes = [f"books:genre:{item}" for item in genre_ids]
+        else:
+            scopes = ["books:all"]
+        version = await catalog_versions.read(kinds=CATALOG)
+        etag = catalog_versions.etag(version=version, params=params)
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        body, version = await listing_cache.fetch(
+            namespace="books", params=params, kinds=CATALOG, conn=session,
+            loader=partial(
+                self._load_books, query=query, sort=sort, attrs=attrs,
+                scopes=scopes
+            )
+        )
+        # The version the listing was built at, older than the current
+        # one when only writes it doesn't depend on happened since.
+        etag = catalog_versions.etag(version=version, params=params)
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        if body is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        return Response(
+            content=body, media_type="application/json",
+            headers=etag_headers(etag=etag)
+        )
+
+    async def export_books(
+        self, file_format: Literal["ndjson", "csv"] = "ndjson",
+        genre_ids: list[int] = Query(None),
+        genre_match: Literal["any", "all"] = "any",
+        author_ids: list[int] = Query(None),
+        min_price: int = None, max_price: int = None,
+        min_pages: int = None, max_pages: int = None,
+        first_name: str = None, last_name: str = None,
+    ):
+        conditions = self._conditions(
+            genre_ids=sorted(set(genre_ids or [])), genre_match=genre_match,
+            author_ids=sorted(set(author_ids or [])), min_price=min_price,
+            max_price=max_price, min_pages=min_pages, max_pages=max_pages,
+            first_name=first_name, last_name=last_name
+        )
+        media_type = {
+            "ndjson": "application/x-ndjson", "csv": "text/csv"
+        }[file_format]
+        return StreamingResponse(
+            content=stream_books(
+                query=export_query(conditions=conditions),
+                file_format=file_format
+            ),
+            media_type=media_type, headers={
+                "Content-Disposition":
+                    f'attachment; filename="books.{file_format}"'
+            }
+        )
 
+    @staticmethod
+    def _conditions(
+        genre_ids: list[int], genre_match: Literal["any", "all"],
+        author_ids: list[int], min_price: int | None,
+        max_price: int | None, min_pages: int | None,
+        max_pages: int | None, first_name: str | None,
+        last_name: str | None
+    ) -> list:
+        """Filters on book_listing, each one backed by its own index."""
+        conditions = []
+        if genre_ids:
+            wanted = cast(array(genre_ids), ARRAY(BigInteger))
+            if genre_match == "all":
+                conditions.append(BookListing.genre_ids.contains(wanted))
+            else:
+                conditions.append(BookListing.genre_ids.overlap(wanted))
+        if author_ids:
+            conditions.append(BookListing.author_id.in_(author_ids))
+        if min_price is not None:
+            conditions.append(BookListing.price >= min_price)
+        if max_price is not None:
+            conditions.append(BookListing.price <= max_price)
+        if min_pages is not None:
+            conditions.append(BookListing.pages >= min_pages)
+        if max_pages is not None:
+            conditions.append(BookListing.pages <= max_pages)
+        if first_name:
+            conditions.append(BookListing.author_first_name == first_name)
+        if last_name:
+            conditions.append(BookListing.author_last_name == last_name)
+        return conditions
+
+    async def search_books(
+        self, q: str, request: Request, response: Response,
+        cursor: str = None,
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        tsquery = func.websearch_to_tsquery(cast("simple", REGCONFIG), q)
+        # The scores are float4. As float8 the value in the cursor reads
+        # back bit for bit, so the keyset seek lands exactly on ties.
+        rank = cast(func.greatest(
+            func.ts_rank(BookListing.search_vector, tsquery),
+            func.word_similarity(q, BookListing.search_document)
+        ), Double)
+        query = select(BookListing).options(
+            with_expression(BookListing.rank, rank)
+        ).where(
+            BookListing.search_vector.op("@@")(tsquery)
+            | literal(q).op("<%")(BookListing.search_document)
+        )
+        try:
+            query = paginate(
+                query=query, columns=[rank, BookListing.book_id],
+                sort="rank",
+                cursor=cursor, descending=True
+            )
+        except InvalidCursor as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        params = {"q": q, "cursor": cursor}
+        version = await catalog_versions.read(kinds=CATALOG)
+        etag = catalog_versions.etag(version=version, params=params)
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        body, version = await listing_cache.fetch(
+            namespace="books:search", params=params, kinds=CATALOG,
+            conn=session, loader=partial(
+                self._load_books, query=query, sort="rank",
+                attrs=["rank", "book_id"], scopes=["books:all"]
+            )
+        )
+        etag = catalog_versions.etag(version=version, params=params)
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        if body is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        return Response(
+            content=body, media_type="application/json",
+            headers=etag_headers(etag=etag)
+        )
 
-        query = query.limit(50).offset(page_number)
+    @staticmethod
+    async def _load_books(
+        session: AsyncSession, query, sort: str, attrs: list[str],
+        scopes: list[str]
+    ) -> tuple[dict | None, list[str]]:
+        """AllBooksSchema body, one query on book_listing."""
         temp = await session.execute(query)
         data = temp.scalars().all()
+        tags = ["books", *scopes]
         if not data:
-            return Response(status_code=status.HTTP_404_NOT_FOUND)
+            return None, tags
         obj = []
         for item in data:
-            author = AuthorSchema(
-                id=item.author.id, first_name=item.author.first_name, 
-                last_name=item.author.last_name, avatar=item.author.avatar
+            obj.append(listing_row(item=item))
+            tags.append(f"book:{item.book_id}")
+            tags.append(f"author:{item.author_id}")
+            tags.extend(f"genre:{genre_id}" for genre_id in item.genre_ids)
+        result = {
+            "response": obj,
+            "next_cursor": next_cursor(rows=data, attrs=attrs, sort=sort)
+        }
+        return result, tags
+    
+    async def get_books_batch(
+        self, response: Response, ids: list[int] = Query(...),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BATCH:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=f"At most {MAX_BATCH} ids per request")
+        query = select(BookListing).where(BookListing.book_id.in_(ids))
+        temp = await session.execute(query)
+        found = {item.book_id: item for item in temp.scalars().all()}
+        result = {
+            "response": [
+                listing_row(item=found[pk]) for pk in ids if pk in found
+            ],
+            "missing": [pk for pk in ids if pk not in found]
+        }
+        return ORJSONResponse(content=result)
+
+    async def add_books_batch(
+        self, obj: BatchCreateBooksSchema, response: Response,
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        rows = [item.model_dump() for item in obj.books]
+        try:
+            created = await book_repository.create_many(
+                session=session, rows=rows
+            )
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        await catalog_versions.bump("books")
+        await listing_cache.invalidate("books:all", *{
+            f"books:genre:{row['genre_id']}" for row in rows
+        })
+        return BatchResultSchema(ids=sorted(row.id for row in created))
+
+    async def update_books_batch(
+        self, obj: BatchUpdateBooksSchema, response: Response,
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        rows = [item.model_dump(exclude_unset=True) for item in obj.books]
+        ids = [row["id"] for row in rows]
+        if len(set(ids)) != len(ids):
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="Each id may appear only once")
+        if not any(len(row) > 1 for row in rows):
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="No fields to update")
+        try:
+            updated = await book_repository.update_many(
+                session=session, rows=rows,
+                returning=(Book.id, Book.genre_id), previous=(Book.genre_id,)
             )
-            genres = [
-                GenreSchema(
-                    id=genre.id, title=genre.title
-                ) for genre in item.genres
+            moved = [
+                row for row in updated if row.genre_id != row.old_genre_id
             ]
-            obj.append(BookSchema(
-                id=item.id, title=item.title, price=item.price, 
-                pages=item.pages, author=author, genre=genres
+            if moved:
+                # Keep books_genres in step with the primary genre.
+                stmt = delete(BookGenre).where(tuple_(
+                    BookGenre.book_id, BookGenre.genre_id
+                ).in_([(row.id, row.old_genre_id) for row in moved]))
+                await session.execute(statement=stmt)
+                stmt = pg_insert(BookGenre).values([
+                    {"book_id": row.id, "genre_id": row.genre_id}
+                    for row in moved
+                ]).on_conflict_do_nothing()
+                await session.execute(statement=stmt)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        updated_ids = {row.id for row in updated}
+        tags = {"books:all"}
+        for row in updated:
+            tags.update((
+                f"book:{row.id}", f"books:genre:{row.genre_id}",
+                f"books:genre:{row.old_genre_id}"
             ))
-        result = AllBooksSchema(response=obj)
-        return result
-    
+        await catalog_versions.bump("books")
+        await listing_cache.invalidate(*tags)
+        return BatchResultSchema(
+            ids=sorted(updated_ids),
+            missing=[pk for pk in ids if pk not in updated_ids]
+        )
+
     async def remove_book(
         self, book_id: int, 
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(Book).where(Book.id == book_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
+        data = await book_repository.delete(
+            session=session, pk=book_id,
+            returning=(Book.id, Book.genre_id)
+        )
         if data:
-            stmt = delete(Book).where(Book.id == book_id)
-            await session.execute(statement=stmt)
             await session.commit()
+            await catalog_versions.bump("books")
+            await listing_cache.invalidate(
+                f"book:{book_id}", "books:all",
+                f"books:genre:{data.genre_id}"
+            )
             return ResponseSchema(
                 response=f"Genre {book_id} is removed!"
             )
@@ -159,28 +557,45 @@ class Books:
         self, book_id: int, obj: UpdateBookSchema, response: Response,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(Book).where(Book.id == book_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
-        if data:
-            update_values = obj.model_dump(exclude_unset=True)
-            if not update_values:
-                response.status_code = status.HTTP_400_BAD_REQUEST
-                return ErrorSchema(error="No fields to update")
-            try:
-                stmt = update(Book).where(
-                    Book.id == book_id
-                ).values(**update_values)
-                await session.execute(statement=stmt)
-                await session.commit()
-                return ResponseSchema(
-                    response=f"Book {book_id} is updated!"
+        update_values = obj.model_dump(exclude_unset=True)
+        if not update_values:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="No fields to update")
+        try:
+            data = await book_repository.update(
+                session=session, pk=book_id, values=update_values,
+                previous=(Book.genre_id,)
+            )
+            if data is None:
+                return Response(status_code=status.HTTP_404_NOT_FOUND)
+            new_genre = update_values.get("genre_id")
+            if new_genre and new_genre != data.old_genre_id:
+                # Keep books_genres in step with the primary genre,
+                # the genre filters read from it.
+                stmt = delete(BookGenre).where(
+                    BookGenre.book_id == book_id,
+                    BookGenre.genre_id == data.old_genre_id
                 )
-            except Exception as e:
-                response.status_code = status.HTTP_400_BAD_REQUEST
-                return ErrorSchema(error=str(e))
-            
-        return Response(status_code=status.HTTP_404_NOT_FOUND)
+                await session.execute(statement=stmt)
+                stmt = pg_insert(BookGenre).values(
+                    book_id=book_id, genre_id=new_genre
+                ).on_conflict_do_nothing()
+                await session.execute(statement=stmt)
+            await session.commit()
+        except Exception as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        tags = [
+            f"book:{book_id}", "books:all",
+            f"books:genre:{data.old_genre_id}"
+        ]
+        if "genre_id" in update_values:
+            tags.append(f"books:genre:{update_values['genre_id']}")
+        await catalog_versions.bump("books")
+        await listing_cache.invalidate(*tags)
+        return ResponseSchema(
+            response=f"Book {book_id} is updated!"
+        )
         
 
 books = Books()
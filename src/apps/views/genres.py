@@ -1,5 +1,5 @@
 # FastApi
-from fastapi import Depends, APIRouter, Response, status
+from fastapi import Depends, APIRouter, Request, Response, status
 
 # Thirt-Party
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,6 +7,13 @@ import sqlalchemy as sa
 
 # Local
 from src.apps.utils.session import get_async_session
+from src.apps.utils.cache import listing_cache
+from src.apps.utils.versions import (
+    catalog_versions, etag_headers, not_modified,
+)
+from src.apps.utils.rows import genre_row
+from src.apps.utils.entity_cache import entity_cache
+from src.apps.utils.repository import genre_repository
 from src.apps.models.genres import Genre
 from src.apps.schemas.genres import (
     GenreSchema, CreateGenreSchema, AllGenresSchema,
@@ -22,9 +29,12 @@ class Genres:
         self.router = APIRouter(prefix="/api/v1", tags=["Genres CRUD"])
         self.router.add_api_route(
             path=self.path, endpoint=self.get_all_genres, 
+            description="""All genres. Send the `ETag` back in
+            `If-None-Match` to get 304 while nothing has changed""",
             methods=["GET"], responses={
                 200: {"model": AllGenresSchema},
-                204: {"model": None}
+                204: {"model": None},
+                304: {"model": None}
             }
         )
         self.router.add_api_route(
@@ -57,39 +67,64 @@ class Genres:
         )
 
     async def get_all_genres(
-        self, session: AsyncSession = Depends(get_async_session)
+        self, request: Request,
+        session: AsyncSession = Depends(get_async_session)
     ):
+        version = await catalog_versions.read(kinds=("genres",))
+        etag = catalog_versions.etag(version=version, params={})
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        body, version = await listing_cache.fetch(
+            namespace="genres", params={}, kinds=("genres",), conn=session,
+            loader=self._load_genres
+        )
+        etag = catalog_versions.etag(version=version, params={})
+        if cached := not_modified(request=request, etag=etag):
+            return cached
+        headers = etag_headers(etag=etag)
+        if body is None:
+            return Response(
+                status_code=status.HTTP_204_NO_CONTENT, headers=headers
+            )
+        return Response(
+            content=body, media_type="application/json", headers=headers
+        )
+
+    @staticmethod
+    async def _load_genres(
+        session: AsyncSession
+    ) -> tuple[dict | None, list[str]]:
+        """AllGenresSchema body."""
         query = sa.select(Genre)
         temp = await session.execute(query)
         data = temp.scalars().all()
         if not data:
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-        obj = []
-        for item in data:
-            obj.append(GenreSchema(id=item.id, title=item.title))
-        result = AllGenresSchema(response=obj)
-        return result
+            return None, ["genres"]
+        result = {"response": [genre_row(item=item) for item in data]}
+        return result, ["genres"]
     
     async def get_genre(
         self, genre_id: int, 
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = sa.select(Genre).where(Genre.id == genre_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
+        data = await entity_cache.get(
+            conn=session, model=Genre, pk=genre_id
+        )
         if not data:
             return Response(status_code=status.HTTP_204_NO_CONTENT)
-        result = GenreSchema(id=data.id, title=data.title)
-        return result
+        return data
     
     async def create_genre(
         self, obj: CreateGenreSchema, response: Response,
         session: AsyncSession = Depends(get_async_session)
     ):
         try:
-            stmt = sa.insert(Genre).values(title=obj.title)
-            await session.execute(statement=stmt)
+            await genre_repository.create(
+                session=session, values={"title": obj.title}
+            )
             await session.commit()
+            await catalog_versions.bump("genres")
+            await listing_cache.invalidate("genres")
             return ResponseSchema(
                 response=f"Genre {obj.title} is created!"
             )
@@ -101,35 +136,33 @@ class Genres:
         self, genre_id: int, obj: CreateGenreSchema, response: Response,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = sa.select(Genre).where(Genre.id == genre_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
-        if data:
-            try:
-                stmt = sa.update(Genre).where(
-                    Genre.id == genre_id
-                ).values(title=obj.title)
-                await session.execute(statement=stmt)
-                await session.commit()
-                return ResponseSchema(
-                    response=f"Genre {genre_id} is updated!"
-                )
-            except Exception as e:
-                response.status_code = status.HTTP_400_BAD_REQUEST
-                return ErrorSchema(error=str(e))
-        return Response(status_code=status.HTTP_404_NOT_FOUND)
+        try:
+            data = await genre_repository.update(
+                session=session, pk=genre_id, values={"title": obj.title}
+            )
+            await session.commit()
+        except Exception as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        if data is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        await catalog_versions.bump("genres")
+        await listing_cache.invalidate("genres", f"genre:{genre_id}")
+        await entity_cache.invalidate(Genre, genre_id)
+        return ResponseSchema(
+            response=f"Genre {genre_id} is updated!"
+        )
 
     async def remove_genre(
         self, genre_id: int, 
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = sa.select(Genre).where(Genre.id == genre_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
+        data = await genre_repository.delete(session=session, pk=genre_id)
         if data:
-            stmt = sa.delete(Genre).where(Genre.id == genre_id)
-            await session.execute(statement=stmt)
             await session.commit()
+            await catalog_versions.bump("genres", "books")
+            await listing_cache.invalidate("genres", "books")
+            await entity_cache.invalidate(Genre, genre_id)
             return ResponseSchema(
                 response=f"Genre {genre_id} is removed!"
             )
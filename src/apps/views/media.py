@@ -0,0 +1,123 @@
+# FastApi
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import FileResponse
+
+# Third-Party
+import anyio
+
+# Python
+import os
+
+# Local
+from src.apps.utils.images import image_pipeline
+from src.apps.utils.media import (
+    RESIZE_SIZES, UnsatisfiableRange, FileRangeResponse, resolve_media,
+    is_immutable, media_etag, etag_matches, parse_range, resized_path,
+)
+from src.apps.schemas.response import ErrorSchema
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=3600"
+
+
+class Media:
+    """Files from the volume, avatars first of all."""
+
+    def __init__(self) -> None:
+        self.path = "/media/{file_path:path}"
+        self.router = APIRouter(tags=["Media"])
+        self.router.add_api_route(
+            path=self.path, endpoint=self.get_file,
+            methods=["GET"], responses={
+                206: {"description": "Partial content"},
+                304: {"model": None},
+                400: {"model": ErrorSchema},
+                404: {"model": None},
+                416: {"model": None}
+            }
+        )
+        # Same handler, kept out of the schema to avoid a duplicate
+        # operation id.
+        self.router.add_api_route(
+            path=self.path, endpoint=self.get_file, methods=["HEAD"],
+            include_in_schema=False
+        )
+
+    async def get_file(
+        self, file_path: str, request: Request, response: Response,
+        size: int = None
+    ):
+        """Serve a file with ETag, Range and cache headers.
+
+        `size` returns a copy scaled to fit size x size, rendered once
+        and kept in the disk cache.
+        """
+        path = resolve_media(path=file_path)
+        if path is None:
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, path)
+        except (FileNotFoundError, NotADirectoryError):
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        if not os.path.isfile(path):
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        etag = await media_etag(path=path, stat_result=stat_result)
+
+        if size is not None:
+            if size not in RESIZE_SIZES:
+                response.status_code = status.HTTP_400_BAD_REQUEST
+                return ErrorSchema(error=f"size must be one of {RESIZE_SIZES}")
+            source, path = path, resized_path(
+                path=path, size=size, etag=etag
+            )
+            etag = f'{etag[:-1]}-{size}"'
+        else:
+            source = path
+
+        headers = {
+            "etag": etag, "accept-ranges": "bytes",
+            "cache-control": IMMUTABLE if is_immutable(source) else REVALIDATE
+        }
+        # Answered before any resize, a revalidation never renders.
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        if size is not None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, path)
+            except FileNotFoundError:
+                try:
+                    await image_pipeline.resize(
+                        source=source, target=path, size=size
+                    )
+                except Exception:
+                    response.status_code = status.HTTP_400_BAD_REQUEST
+                    return ErrorSchema(error="File is not a supported image")
+                stat_result = await anyio.to_thread.run_sync(os.stat, path)
+
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range == etag:
+            try:
+                byte_range = parse_range(
+                    request.headers.get("range"), stat_result.st_size
+                )
+            except UnsatisfiableRange as e:
+                return Response(
+                    status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={**headers, "content-range": str(e)}
+                )
+        if byte_range:
+            return FileRangeResponse(
+                path=path, start=byte_range[0], end=byte_range[1],
+                stat_result=stat_result, headers=headers
+            )
+        return FileResponse(
+            path=path, stat_result=stat_result, headers=headers
+        )
+
+
+media = Media()
@@ -3,7 +3,10 @@ from fastapi import Depends, APIRouter, Response, status
 
 # Thirt-Party
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, insert, update
+from sqlalchemy import select, and_
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
+from psycopg.errors import ExclusionViolation
 
 # Python
 from typing import Literal
@@ -11,17 +14,19 @@ from datetime import date, datetime
 
 # Local
 from src.apps.utils.session import get_async_session
+from src.apps.utils.pagination import paginate, next_cursor, InvalidCursor
+from src.apps.utils.rows import reserv_row
+from src.apps.utils.repository import reserv_repository
+from src.apps.utils.responses import ORJSONResponse
 from src.apps.models.reserv import BookReservation
 from src.apps.models.users import User
-from src.apps.models.books import Book
-from src.apps.schemas.users import UserRead
-from src.apps.schemas.books import ZipBookSchema
 from src.apps.schemas.reserv import (
-    GetReservationSchema, AllReservationsSchema,
-    CreateReserveSchema,
+    AllReservationsSchema, CreateReserveSchema,
 )
 from src.apps.schemas.response import ResponseSchema, ErrorSchema
 from src.apps.utils.jwt_backend import current_user
+from src.apps.utils.expiry import schedule_expiry, cancel_expiry
+from src.settings.base import AIOREDIS
 
 
 class BookReserv:
@@ -45,7 +50,8 @@ class BookReserv:
             responses={
                 200: {"model": ResponseSchema},
                 400: {"model": ErrorSchema},
-                401: {"model": None}
+                401: {"model": None},
+                409: {"model": ErrorSchema}
             }
         )
         self.router.add_api_route(
@@ -61,12 +67,15 @@ class BookReserv:
         self, response: Response, book_title: str = None,
         start_date: date | str = None, 
         end_date: date | str = None, 
-        page_number: int = 0,
+        page_number: int = 0, cursor: str = None,
         on_hands: Literal["True", "False"] = None,
         is_returned: Literal["True", "False"] = None,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(BookReservation)
+        query = select(BookReservation).options(
+            joinedload(BookReservation.user),
+            joinedload(BookReservation.book)
+        )
         conditions = []
         if start_date:
             if isinstance(start_date, str):
@@ -111,32 +120,23 @@ class BookReserv:
         elif len(conditions) == 1:
             query = query.where(conditions[0])
 
-        query = query.limit(50).offset(page_number)
+        try:
+            query = paginate(
+                query=query, columns=[BookReservation.id], sort="id",
+                cursor=cursor, page_number=page_number
+            )
+        except InvalidCursor as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
         temp = await session.execute(query)
         data = temp.scalars().all()
         if not data:
             return Response(status_code=status.HTTP_204_NO_CONTENT)
-        obj = []
-        for item in data:
-            user: User = item.user
-            book: Book = item.book
-            user_schema = UserRead(
-                id=user.id, email=user.email, avatar=user.avatar,
-                first_name=user.first_name, last_name=user.last_name
-            )
-            book_schema = ZipBookSchema(
-                id=book.id, title=book.title, pages=book.pages, 
-                price=book.price, author_id=book.author_id, 
-                genre_id=book.genre_id
-            )
-            obj.append(GetReservationSchema(
-                id=item.id, begin_date=item.begin_date, 
-                end_date=item.end_date, on_hands=item.on_hands, 
-                is_returned=item.is_returned, user=user_schema,
-                book=book_schema
-            ))
-        result = AllReservationsSchema(response=obj)
-        return result
+        result = {
+            "response": [reserv_row(item=item) for item in data],
+            "next_cursor": next_cursor(rows=data, attrs=["id"], sort="id")
+        }
+        return ORJSONResponse(content=result)
     
     async def make_reserv(
         self, obj: CreateReserveSchema, response: Response,
@@ -147,23 +147,26 @@ class BookReserv:
             return Response(status_code=status.HTTP_401_UNAUTHORIZED)
         user_id = user.id
         schema = CreateReserveSchema.model_validate(obj=obj)
-        query = select(BookReservation).where(and_(
-            BookReservation.book_id == schema.book_id,
-            BookReservation.begin_date <= schema.begin_date,
-            BookReservation.end_date >= schema.begin_date,
-            BookReservation.on_hands == True
-        ))
-        temp = await session.execute(query)
-        data = temp.scalars().all()
-        if data:
+        if schema.begin_date > schema.end_date:
             response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="Дата начала позже даты окончания")
+        # Overlaps are rejected by the reserv_book_id_dates_excl
+        # constraint, so concurrent requests can't double book a copy.
+        try:
+            data = await reserv_repository.create(session=session, values={
+                "user_id": user_id, "book_id": schema.book_id,
+                "begin_date": schema.begin_date, "end_date": schema.end_date
+            })
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            if not isinstance(e.orig, ExclusionViolation):
+                raise
+            response.status_code = status.HTTP_409_CONFLICT
             return ErrorSchema(error="Книга уже занята")
-        stmt = insert(BookReservation).values(
-            user_id=user_id, book_id=schema.book_id,
-            begin_date=schema.begin_date, end_date=schema.end_date
+        await schedule_expiry(
+            redis=AIOREDIS, reserv_id=data.id, end_date=schema.end_date
         )
-        await session.execute(statement=stmt)
-        await session.commit()
         return ResponseSchema(response="Книга успешно забронирована!")
     
     async def return_book(
@@ -173,19 +176,17 @@ class BookReserv:
         if not user:
             return Response(status_code=status.HTTP_401_UNAUTHORIZED)
         now = datetime.now()
-        query = select(BookReservation).where(and_(
-            BookReservation.id == reserv_id,
-            BookReservation.end_date >= now.date(),
-            BookReservation.on_hands == True
-        ))
-        temp = await session.execute(query)
-        data = temp.scalars().all()
+        data = await reserv_repository.update(
+            session=session, pk=reserv_id,
+            values={"on_hands": False, "is_returned": True},
+            where=(
+                BookReservation.end_date >= now.date(),
+                BookReservation.on_hands == True
+            )
+        )
         if data:
-            stmt = update(BookReservation).where(
-                BookReservation.id == reserv_id
-            ).values(on_hands=False, is_returned=True)
-            await session.execute(statement=stmt)
             await session.commit()
+            await cancel_expiry(AIOREDIS, reserv_id)
             return ResponseSchema(
                 response="Спасибо, берите еще что нибудь"
             )
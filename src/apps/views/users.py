@@ -10,18 +10,24 @@ from fastapi_users.authentication import JWTStrategy
 from fastapi_users.openapi import OpenAPIResponseType
 from fastapi_users.router.common import ErrorCode, ErrorModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select, update
-from PIL import Image
+from sqlalchemy import select
 
 # Python
 from typing import Annotated, Tuple, Optional
-import io
-import os
 
 # Local
-from src.settings.const import VOLUME
 from src.apps.utils.jwt_backend import auth_backend, get_jwt_strategy
 from src.apps.utils.session import get_async_session
+from src.apps.utils.pagination import paginate, next_cursor, InvalidCursor
+from src.apps.utils.entity_cache import entity_cache
+from src.apps.utils.repository import user_repository
+from src.apps.utils.rows import user_row
+from src.apps.utils.responses import ORJSONResponse
+from src.apps.utils.images import (
+    ImageUploadRoute, image_pipeline, accept_image
+)
+from src.apps.utils.avatars import avatar_dir
+from src.apps.utils.uploads import InvalidUpload, discard_upload
 from src.apps.utils.manager import get_user_manager, UserManager
 from src.apps.models.users import User
 from src.apps.schemas.users import (
@@ -37,7 +43,7 @@ class Registration:
         self.router = APIRouter(prefix="/auth", tags=["Users module"])
         self.router.add_api_route(
             path="/reg", endpoint=self.register, methods=["POST"],
-            response_model=UserRead,
+            response_model=UserRead, route_class_override=ImageUploadRoute,
             status_code=status.HTTP_201_CREATED,
             responses={400: {
                 "model": ErrorModel,
@@ -64,6 +70,7 @@ class Registration:
                     }
                 },
             },
+            413: {"model": ErrorSchema}
         })
         self.router.add_api_route(
             path="/users/{user_id}", endpoint=self.remove_user,
@@ -75,10 +82,12 @@ class Registration:
         self.router.add_api_route(
             path="/users/", endpoint=self.get_all_users, 
             description="""Get all users with pagination,
-            pages begining by 0""",
+            pages begining by 0. Pass `next_cursor` from the previous
+            response as `cursor` to page by key instead of offset""",
             methods=["GET"], responses={
                 200: {"model": AllUsersSchema},
-                204: {"model": None}
+                204: {"model": None},
+                400: {"model": ErrorSchema}
             }
         )
         self.router.add_api_route(
@@ -90,10 +99,12 @@ class Registration:
         )
         self.router.add_api_route(
             path="/users/{user_id}", endpoint=self.update_user, 
-            methods=["PUT"], responses={
+            methods=["PUT"], route_class_override=ImageUploadRoute,
+            responses={
                 200: {"model": ResponseSchema},
                 400: {"model": ErrorSchema},
-                404: {"model": None}
+                404: {"model": None},
+                413: {"model": ErrorSchema}
             }
         )
 
@@ -106,15 +117,18 @@ class Registration:
         user_manager: UserManager = Depends(get_user_manager),
     ):
         try:
-            image = Image.open(io.BytesIO(await avatar.read()))
-            avatar_filename = f"users/{email}_{avatar.filename}"
-            avatar_path = os.path.join(VOLUME, avatar_filename)
-            os.makedirs(os.path.dirname(avatar_path), exist_ok=True)
+            image, digest = await accept_image(upload=avatar)
+        except InvalidUpload as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
+        created_user = None
+        try:
+            avatar_path = avatar_dir(digest=digest)
             schema = UserCreate(
                 email=email, password=password, first_name=first_name,
                 last_name=last_name, avatar=avatar_path
             )
-            image.save(avatar_path)
             created_user = await user_manager.create(
                 user_create=schema, safe=True
             )
@@ -131,6 +145,12 @@ class Registration:
                     "reason": e.reason,
                 },
             )
+        finally:
+            # Any failure, a busy password pool or an invalid field
+            # included, leaves the spooled avatar unused.
+            if created_user is None:
+                discard_upload(path=image)
+        image_pipeline.queue(path=image, target_dir=avatar_path)
         schema = UserRead.model_validate(obj=created_user)
         return schema
     
@@ -138,51 +158,46 @@ class Registration:
         self, user_id: int,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(User).where(User.id == user_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
+        data = await user_repository.delete(session=session, pk=user_id)
         if data:
-            stmt = delete(User).where(User.id == user_id)
-            await session.execute(statement=stmt)
             await session.commit()
+            await entity_cache.invalidate(User, user_id)
             return ResponseSchema(
                 response=f"Author {user_id} is removed!"
             )
         return Response(status_code=status.HTTP_404_NOT_FOUND)
     
     async def get_all_users(
-        self, page_number: int = 0, 
+        self, response: Response, page_number: int = 0,
+        cursor: str = None,
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(User).limit(50).offset(page_number)
+        try:
+            query = paginate(
+                query=select(User), columns=[User.id], sort="id",
+                cursor=cursor, page_number=page_number
+            )
+        except InvalidCursor as e:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
         temp = await session.execute(query)
         data = temp.scalars().all()
         if not data:
             return Response(status_code=status.HTTP_204_NO_CONTENT)
-        obj = []
-        for item in data:
-            obj.append(UserRead(
-                id=item.id, first_name=item.first_name, email=item.email,
-                last_name=item.last_name, avatar=item.avatar
-            ))
-        result = AllUsersSchema(response=obj)
-        return result
+        result = {
+            "response": [user_row(item=item) for item in data],
+            "next_cursor": next_cursor(rows=data, attrs=["id"], sort="id")
+        }
+        return ORJSONResponse(content=result)
     
     async def get_user(
         self, user_id: int, 
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(User).where(User.id == user_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
+        data = await entity_cache.get(conn=session, model=User, pk=user_id)
         if not data:
             return Response(status_code=status.HTTP_204_NO_CONTENT)
-        result = UserRead(
-            id=data.id, email=data.email, is_active=data.is_active, 
-            is_superuser=data.is_superuser, is_verified=data.is_verified,
-            first_name=data.first_name, last_name=data.last_name
-        )
-        return result
+        return data
     
     async def update_user(
         self, user_id: int, response: Response,
@@ -191,40 +206,43 @@ class Registration:
         avatar: Optional[UploadFile] = File(None), 
         session: AsyncSession = Depends(get_async_session)
     ):
-        query = select(User).where(User.id == user_id)
-        temp = await session.execute(query)
-        data = temp.scalar()
-        if data:
-            update_values = {}
-            if first_name:
-                update_values['first_name'] = first_name
-            if last_name:
-                update_values['last_name'] = last_name
-            if avatar:
-                image = Image.open(io.BytesIO(await avatar.read()))
-                name = os.urandom(32).hex()
-                avatar_filename = f"users/{name}"
-                avatar_path = os.path.join(VOLUME, avatar_filename)
-                os.makedirs(os.path.dirname(avatar_path), exist_ok=True)
-                update_values['avatar'] = avatar_path
-                image.save(avatar_path)
-            if not update_values:
-                response.status_code = status.HTTP_400_BAD_REQUEST
-                return ErrorSchema(error="No fields to update")
-
+        update_values = {}
+        if first_name:
+            update_values['first_name'] = first_name
+        if last_name:
+            update_values['last_name'] = last_name
+        image = None
+        if avatar:
             try:
-                stmt = update(User).where(
-                    User.id == user_id
-                ).values(**update_values)
-                await session.execute(statement=stmt)
-                await session.commit()
-                return ResponseSchema(
-                    response=f"User {user_id} is updated!"
-                )
-            except Exception as e:
+                image, digest = await accept_image(upload=avatar)
+            except InvalidUpload as e:
                 response.status_code = status.HTTP_400_BAD_REQUEST
                 return ErrorSchema(error=str(e))
-        return Response(status_code=status.HTTP_404_NOT_FOUND)
+            update_values['avatar'] = avatar_dir(digest=digest)
+        if not update_values:
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error="No fields to update")
+
+        try:
+            data = await user_repository.update(
+                session=session, pk=user_id, values=update_values
+            )
+            await session.commit()
+        except Exception as e:
+            discard_upload(path=image)
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return ErrorSchema(error=str(e))
+        if data is None:
+            discard_upload(path=image)
+            return Response(status_code=status.HTTP_404_NOT_FOUND)
+        if image:
+            image_pipeline.queue(
+                path=image, target_dir=update_values['avatar']
+            )
+        await entity_cache.invalidate(User, user_id)
+        return ResponseSchema(
+            response=f"User {user_id} is updated!"
+        )
 
 
 class LoginLogout:
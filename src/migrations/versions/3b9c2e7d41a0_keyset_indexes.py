@@ -0,0 +1,26 @@
+"""keyset indexes
+
+Revision ID: 3b9c2e7d41a0
+Revises: 16650b3e195f
+Create Date: 2026-10-18 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9c2e7d41a0'
+down_revision: Union[str, None] = '16650b3e195f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_books_price_id', 'books', ['price', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_price_id', table_name='books')
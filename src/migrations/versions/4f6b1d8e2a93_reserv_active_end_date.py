@@ -0,0 +1,26 @@
+"""reserv active end date
+
+Revision ID: 4f6b1d8e2a93
+Revises: e2a7c4b90d58
+Create Date: 2026-10-18 13:52:18.740316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6b1d8e2a93'
+down_revision: Union[str, None] = 'e2a7c4b90d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reserv_end_date_active', 'reserv', ['end_date'], unique=False, postgresql_where=sa.text('NOT is_returned'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reserv_end_date_active', table_name='reserv', postgresql_where=sa.text('NOT is_returned'))
@@ -0,0 +1,28 @@
+"""import lookup indexes
+
+Revision ID: 71d3e8f9b2c4
+Revises: c5f0a92b3d17
+Create Date: 2026-10-18 12:34:09.627731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '71d3e8f9b2c4'
+down_revision: Union[str, None] = 'c5f0a92b3d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_authors_last_name_first_name', 'authors', ['last_name', 'first_name'], unique=False)
+    op.create_index(op.f('ix_genres_title'), 'genres', ['title'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_genres_title'), table_name='genres')
+    op.drop_index('ix_authors_last_name_first_name', table_name='authors')
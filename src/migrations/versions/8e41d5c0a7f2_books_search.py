@@ -0,0 +1,75 @@
+"""books search
+
+Revision ID: 8e41d5c0a7f2
+Revises: 3b9c2e7d41a0
+Create Date: 2026-10-18 11:03:27.904415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41d5c0a7f2'
+down_revision: Union[str, None] = '3b9c2e7d41a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('books', sa.Column('search_document', sa.Text(), nullable=True))
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute("""
+        CREATE FUNCTION books_search_update() RETURNS trigger AS $$
+        DECLARE
+            author_name text;
+        BEGIN
+            SELECT concat_ws(' ', first_name, last_name) INTO author_name
+            FROM authors WHERE id = NEW.author_id;
+            NEW.search_document := concat_ws(' ', NEW.title, author_name);
+            NEW.search_vector :=
+                setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(author_name, '')), 'B');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER books_search_update
+        BEFORE INSERT OR UPDATE OF title, author_id ON books
+        FOR EACH ROW EXECUTE FUNCTION books_search_update()
+    """)
+    op.execute("""
+        CREATE FUNCTION authors_search_update() RETURNS trigger AS $$
+        BEGIN
+            UPDATE books SET title = title WHERE author_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER authors_search_update
+        AFTER UPDATE OF first_name, last_name ON authors
+        FOR EACH ROW
+        WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name
+              OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+        EXECUTE FUNCTION authors_search_update()
+    """)
+    op.execute("UPDATE books SET title = title")
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_books_search_document_trgm', 'books', ['search_document'], unique=False, postgresql_using='gin', postgresql_ops={'search_document': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_search_document_trgm', table_name='books')
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.execute("DROP TRIGGER authors_search_update ON authors")
+    op.execute("DROP FUNCTION authors_search_update()")
+    op.execute("DROP TRIGGER books_search_update ON books")
+    op.execute("DROP FUNCTION books_search_update()")
+    op.drop_column('books', 'search_vector')
+    op.drop_column('books', 'search_document')
@@ -0,0 +1,82 @@
+"""avatar blobs
+
+Revision ID: 9a3d5f1c7e28
+Revises: 4f6b1d8e2a93
+Create Date: 2026-10-18 14:31:06.215873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3d5f1c7e28'
+down_revision: Union[str, None] = '4f6b1d8e2a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('avatar_blobs',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('refcount', sa.Integer(), nullable=False),
+    sa.Column('released_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    op.create_index('ix_avatar_blobs_released_at', 'avatar_blobs', ['released_at'], unique=False, postgresql_where=sa.text('refcount <= 0'))
+    op.execute("""
+        CREATE FUNCTION avatar_blobs_refcount() RETURNS trigger AS $$
+        DECLARE
+            old_digest text;
+            new_digest text;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                old_digest := substring(OLD.avatar from '([0-9a-f]{64})$');
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                new_digest := substring(NEW.avatar from '([0-9a-f]{64})$');
+            END IF;
+            IF old_digest IS NOT DISTINCT FROM new_digest THEN
+                RETURN NULL;
+            END IF;
+            IF new_digest IS NOT NULL THEN
+                INSERT INTO avatar_blobs (digest, refcount) VALUES (new_digest, 1)
+                ON CONFLICT (digest) DO UPDATE
+                SET refcount = avatar_blobs.refcount + 1, released_at = NULL;
+            END IF;
+            IF old_digest IS NOT NULL THEN
+                UPDATE avatar_blobs SET
+                    refcount = refcount - 1,
+                    released_at = CASE WHEN refcount <= 1 THEN now() END
+                WHERE digest = old_digest;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in ('"user"', 'authors'):
+        op.execute(f"""
+            CREATE TRIGGER avatar_blobs_refcount
+            AFTER INSERT OR DELETE OR UPDATE OF avatar ON {table}
+            FOR EACH ROW EXECUTE FUNCTION avatar_blobs_refcount()
+        """)
+    op.execute("""
+        INSERT INTO avatar_blobs (digest, refcount)
+        SELECT digest, count(*) FROM (
+            SELECT substring(avatar from '([0-9a-f]{64})$') AS digest FROM "user"
+            UNION ALL
+            SELECT substring(avatar from '([0-9a-f]{64})$') FROM authors
+        ) AS avatars
+        WHERE digest IS NOT NULL
+        GROUP BY digest
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER avatar_blobs_refcount ON authors')
+    op.execute('DROP TRIGGER avatar_blobs_refcount ON "user"')
+    op.execute("DROP FUNCTION avatar_blobs_refcount()")
+    op.drop_index('ix_avatar_blobs_released_at', table_name='avatar_blobs', postgresql_where=sa.text('refcount <= 0'))
+    op.drop_table('avatar_blobs')
@@ -0,0 +1,32 @@
+"""books genres cascade
+
+Revision ID: b8c1e4f7a2d6
+Revises: 9a3d5f1c7e28
+Create Date: 2026-10-18 16:12:44.508231
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c1e4f7a2d6'
+down_revision: Union[str, None] = '9a3d5f1c7e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('books_genres_book_id_fkey', 'books_genres', type_='foreignkey')
+    op.drop_constraint('books_genres_genre_id_fkey', 'books_genres', type_='foreignkey')
+    op.create_foreign_key('books_genres_book_id_fkey', 'books_genres', 'books', ['book_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('books_genres_genre_id_fkey', 'books_genres', 'genres', ['genre_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('books_genres_genre_id_fkey', 'books_genres', type_='foreignkey')
+    op.drop_constraint('books_genres_book_id_fkey', 'books_genres', type_='foreignkey')
+    op.create_foreign_key('books_genres_genre_id_fkey', 'books_genres', 'genres', ['genre_id'], ['id'])
+    op.create_foreign_key('books_genres_book_id_fkey', 'books_genres', 'books', ['book_id'], ['id'])
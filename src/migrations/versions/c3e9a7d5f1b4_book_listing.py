@@ -0,0 +1,217 @@
+"""book listing
+
+Revision ID: c3e9a7d5f1b4
+Revises: b8c1e4f7a2d6
+Create Date: 2026-10-18 19:48:05.317620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7d5f1b4'
+down_revision: Union[str, None] = 'b8c1e4f7a2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = (
+    "title", "price", "pages", "author_id", "author_first_name",
+    "author_last_name", "author_avatar", "genre_ids", "genre_titles",
+    "search_document", "search_vector",
+)
+
+
+def upgrade() -> None:
+    op.create_table('book_listing',
+    sa.Column('book_id', sa.BigInteger(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('pages', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.BigInteger(), nullable=False),
+    sa.Column('author_first_name', sa.String(), nullable=False),
+    sa.Column('author_last_name', sa.String(), nullable=False),
+    sa.Column('author_avatar', sa.String(), nullable=True),
+    sa.Column('genre_ids', postgresql.ARRAY(sa.BigInteger()), server_default='{}', nullable=False),
+    sa.Column('genre_titles', postgresql.ARRAY(sa.String()), server_default='{}', nullable=False),
+    sa.Column('search_document', sa.Text(), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id')
+    )
+    # The single definition of a listing row, used by the refresh and
+    # the backfill below.
+    op.execute("""
+        CREATE VIEW book_listing_source AS
+        SELECT b.id AS book_id, b.title, b.price, b.pages, b.author_id,
+               a.first_name AS author_first_name,
+               a.last_name AS author_last_name,
+               a.avatar AS author_avatar,
+               coalesce(g.ids, '{}') AS genre_ids,
+               coalesce(g.titles, '{}') AS genre_titles,
+               b.search_document, b.search_vector
+        FROM books b
+        JOIN authors a ON a.id = b.author_id
+        LEFT JOIN LATERAL (
+            SELECT array_agg(gn.id ORDER BY gn.id) AS ids,
+                   array_agg(gn.title ORDER BY gn.id) AS titles
+            FROM books_genres bg
+            JOIN genres gn ON gn.id = bg.genre_id
+            WHERE bg.book_id = b.id
+        ) g ON true
+    """)
+    columns = ", ".join(COLUMNS)
+    excluded = ", ".join(f"EXCLUDED.{column}" for column in COLUMNS)
+    # Two writers refreshing the same book would each copy what their
+    # own snapshot sees. Locking the rows first makes the second one wait
+    # for the first to commit, and the INSERT statement then starts with
+    # a snapshot that includes it. Unchanged rows are skipped, so repeated
+    # refreshes leave no dead tuples behind.
+    op.execute(f"""
+        CREATE FUNCTION book_listing_refresh(book_ids bigint[])
+        RETURNS void AS $$
+            SELECT 1 FROM book_listing WHERE book_id = ANY(book_ids)
+            ORDER BY book_id FOR UPDATE;
+            INSERT INTO book_listing AS l (book_id, {columns})
+            SELECT book_id, {columns} FROM book_listing_source
+            WHERE book_id = ANY(book_ids)
+            ON CONFLICT (book_id) DO UPDATE SET ({columns}) = ({excluded})
+            WHERE (l.{", l.".join(COLUMNS)}) IS DISTINCT FROM ({excluded})
+        $$ LANGUAGE sql
+    """)
+    # Statement level triggers with transition tables, so a multi-row
+    # write refreshes its books with one set-based statement.
+    op.execute("""
+        CREATE FUNCTION book_listing_books() RETURNS trigger AS $$
+        BEGIN
+            PERFORM book_listing_refresh(ARRAY(SELECT id FROM new_rows));
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for event in ("INSERT", "UPDATE"):
+        op.execute(f"""
+            CREATE TRIGGER book_listing_books_{event.lower()}
+            AFTER {event} ON books
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION book_listing_books()
+        """)
+    op.execute("""
+        CREATE FUNCTION book_listing_books_genres() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM book_listing_refresh(
+                    ARRAY(SELECT DISTINCT book_id FROM new_rows)
+                );
+            ELSE
+                PERFORM book_listing_refresh(
+                    ARRAY(SELECT DISTINCT book_id FROM old_rows)
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER book_listing_books_genres_insert
+        AFTER INSERT ON books_genres
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION book_listing_books_genres()
+    """)
+    op.execute("""
+        CREATE TRIGGER book_listing_books_genres_delete
+        AFTER DELETE ON books_genres
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION book_listing_books_genres()
+    """)
+    op.execute("""
+        CREATE FUNCTION book_listing_authors() RETURNS trigger AS $$
+        BEGIN
+            PERFORM book_listing_refresh(ARRAY(
+                SELECT b.id FROM books b
+                JOIN new_rows n ON n.id = b.author_id
+                JOIN old_rows o ON o.id = n.id
+                WHERE (n.first_name, n.last_name, n.avatar)
+                      IS DISTINCT FROM (o.first_name, o.last_name, o.avatar)
+            ));
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER book_listing_authors
+        AFTER UPDATE ON authors
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION book_listing_authors()
+    """)
+    op.execute("""
+        CREATE FUNCTION book_listing_genres() RETURNS trigger AS $$
+        BEGIN
+            PERFORM book_listing_refresh(ARRAY(
+                SELECT DISTINCT bg.book_id FROM books_genres bg
+                JOIN new_rows n ON n.id = bg.genre_id
+                JOIN old_rows o ON o.id = n.id
+                WHERE n.title IS DISTINCT FROM o.title
+            ));
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER book_listing_genres
+        AFTER UPDATE ON genres
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION book_listing_genres()
+    """)
+    # Deletes need no trigger: book_listing.book_id cascades from books,
+    # which cascade from authors and genres, and books_genres deletes
+    # refresh the remaining books above.
+    op.execute(f"""
+        INSERT INTO book_listing (book_id, {columns})
+        SELECT book_id, {columns} FROM book_listing_source
+    """)
+    # Built after the backfill, which is much faster than maintaining
+    # them row by row.
+    op.create_index('ix_book_listing_price_book_id', 'book_listing', ['price', 'book_id'], unique=False)
+    op.create_index('ix_book_listing_author_id_book_id', 'book_listing', ['author_id', 'book_id'], unique=False)
+    op.create_index('ix_book_listing_author_id_price_book_id', 'book_listing', ['author_id', 'price', 'book_id'], unique=False)
+    op.create_index('ix_book_listing_pages', 'book_listing', ['pages'], unique=False)
+    op.create_index('ix_book_listing_author_first_name', 'book_listing', ['author_first_name'], unique=False)
+    op.create_index('ix_book_listing_author_last_name', 'book_listing', ['author_last_name'], unique=False)
+    op.create_index('ix_book_listing_genre_ids', 'book_listing', ['genre_ids'], unique=False, postgresql_using='gin')
+    op.create_index('ix_book_listing_search_vector', 'book_listing', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_book_listing_search_document_trgm', 'book_listing', ['search_document'], unique=False, postgresql_using='gin', postgresql_ops={'search_document': 'gin_trgm_ops'})
+    # Listing filters, keyset pages and search read the copies in
+    # book_listing now.
+    op.drop_index('ix_books_search_document_trgm', table_name='books')
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_index('ix_books_pages', table_name='books')
+    op.drop_index('ix_books_author_id_price_id', table_name='books')
+    op.drop_index('ix_books_author_id_id', table_name='books')
+    op.drop_index('ix_books_price_id', table_name='books')
+
+
+def downgrade() -> None:
+    op.create_index('ix_books_price_id', 'books', ['price', 'id'], unique=False)
+    op.create_index('ix_books_author_id_id', 'books', ['author_id', 'id'], unique=False)
+    op.create_index('ix_books_author_id_price_id', 'books', ['author_id', 'price', 'id'], unique=False)
+    op.create_index('ix_books_pages', 'books', ['pages'], unique=False)
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_books_search_document_trgm', 'books', ['search_document'], unique=False, postgresql_using='gin', postgresql_ops={'search_document': 'gin_trgm_ops'})
+    op.execute("DROP TRIGGER book_listing_genres ON genres")
+    op.execute("DROP FUNCTION book_listing_genres()")
+    op.execute("DROP TRIGGER book_listing_authors ON authors")
+    op.execute("DROP FUNCTION book_listing_authors()")
+    op.execute("DROP TRIGGER book_listing_books_genres_delete ON books_genres")
+    op.execute("DROP TRIGGER book_listing_books_genres_insert ON books_genres")
+    op.execute("DROP FUNCTION book_listing_books_genres()")
+    op.execute("DROP TRIGGER book_listing_books_update ON books")
+    op.execute("DROP TRIGGER book_listing_books_insert ON books")
+    op.execute("DROP FUNCTION book_listing_books()")
+    op.execute("DROP FUNCTION book_listing_refresh(bigint[])")
+    op.execute("DROP VIEW book_listing_source")
+    op.drop_table('book_listing')
@@ -0,0 +1,40 @@
+"""filter indexes
+
+Revision ID: c5f0a92b3d17
+Revises: 8e41d5c0a7f2
+Create Date: 2026-10-18 11:47:55.213380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f0a92b3d17'
+down_revision: Union[str, None] = '8e41d5c0a7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_books_author_id_id', 'books', ['author_id', 'id'], unique=False)
+    op.create_index('ix_books_author_id_price_id', 'books', ['author_id', 'price', 'id'], unique=False)
+    op.create_index('ix_books_genre_id', 'books', ['genre_id'], unique=False)
+    op.create_index('ix_books_pages', 'books', ['pages'], unique=False)
+    op.create_index('ix_books_genres_genre_id_book_id', 'books_genres', ['genre_id', 'book_id'], unique=False)
+    # Books created before add_book wrote books_genres have no link rows.
+    op.execute("""
+        INSERT INTO books_genres (book_id, genre_id)
+        SELECT id, genre_id FROM books WHERE genre_id IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_genres_genre_id_book_id', table_name='books_genres')
+    op.drop_index('ix_books_pages', table_name='books')
+    op.drop_index('ix_books_genre_id', table_name='books')
+    op.drop_index('ix_books_author_id_price_id', table_name='books')
+    op.drop_index('ix_books_author_id_id', table_name='books')
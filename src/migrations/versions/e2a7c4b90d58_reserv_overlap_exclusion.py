@@ -0,0 +1,33 @@
+"""reserv overlap exclusion
+
+Revision ID: e2a7c4b90d58
+Revises: 71d3e8f9b2c4
+Create Date: 2026-10-18 13:16:42.085531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c4b90d58'
+down_revision: Union[str, None] = '71d3e8f9b2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fails if overlapping reservations already exist, resolve them first.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("""
+        ALTER TABLE reserv ADD CONSTRAINT reserv_book_id_dates_excl
+        EXCLUDE USING gist (
+            book_id WITH =, daterange(begin_date, end_date, '[]') WITH &&
+        ) WHERE (on_hands)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('reserv_book_id_dates_excl', 'reserv', type_='exclude')
@@ -0,0 +1,32 @@
+# Local
+from .base import logger, AIOREDIS, app
+from src.apps.views.users import reg, login_logout
+from src.apps.views.genres import genres
+from src.apps.views.authors import authors
+from src.apps.views.books import books
+from src.apps.views.reserv import reserv
+from src.apps.views.media import media
+from src.apps.utils.entity_cache import entity_cache
+from src.apps.utils.revocation import revocation
+from src.apps.utils.images import image_pipeline
+
+
+async def shutdown():
+    await AIOREDIS.aclose()
+    logger.info(msg="SHUTDOWN SERVER")
+
+
+# Registered at import, so every worker that loads this module is complete.
+app.include_router(router=login_logout.router)
+app.include_router(router=reg.router)
+app.include_router(router=genres.router)
+app.include_router(router=authors.router)
+app.include_router(router=books.router)
+app.include_router(router=reserv.router)
+app.include_router(router=media.router)
+app.add_event_handler("startup", entity_cache.start)
+app.add_event_handler("startup", revocation.start)
+app.add_event_handler("shutdown", entity_cache.stop)
+app.add_event_handler("shutdown", revocation.stop)
+app.add_event_handler("shutdown", image_pipeline.shutdown)
+app.add_event_handler("shutdown", shutdown)
@@ -18,10 +18,16 @@ import logging
 from logging.config import dictConfig
 
 # Local
-from .const import DB_URL, CELERY_BROKER_URL
+from src.apps.utils.responses import ORJSONResponse
+from .const import (
+    DB_URL, CELERY_BROKER_URL, REDIS_URL, EXPIRY_POLL_SECONDS,
+    REDIS_POOL_SIZE, REDIS_POOL_TIMEOUT,
+)
 
 
-app = FastAPI(title="Book Catalog", debug=True)
+app = FastAPI(
+    title="Book Catalog", debug=True, default_response_class=ORJSONResponse
+)
 app.add_middleware(
     middleware_class=CORSMiddleware, 
     allow_origins=["http://127.0.0.1"],
@@ -38,8 +44,10 @@ session = async_sessionmaker(
 
 fake = Faker()
 
-POOL = aioredis.ConnectionPool.from_url(
-    url="redis://127.0.0.1:6379/7", max_connections=20
+# Blocks for a free connection instead of failing past the limit.
+POOL = aioredis.BlockingConnectionPool.from_url(
+    url=REDIS_URL, max_connections=REDIS_POOL_SIZE,
+    timeout=REDIS_POOL_TIMEOUT
 )
 AIOREDIS = aioredis.Redis(connection_pool=POOL)
 LOGGING = {
@@ -68,6 +76,16 @@ logger = logging.getLogger(__name__)
 
 celery = Celery("src.settings.base", broker=CELERY_BROKER_URL)
 celery.conf.beat_schedule = {
+    'expire-due': {
+        'task': 'expire-due-reservations',
+        'schedule': EXPIRY_POLL_SECONDS,
+        'options': {'expires': EXPIRY_POLL_SECONDS},
+    },
+    'collect-avatars': {
+        'task': 'collect-avatars',
+        'schedule': crontab(minute=30)
+    },
+    # Reconciliation for anything the poller missed.
     'every-day': {
         'task': 'reset-reservations',
         'schedule': crontab(hour=0, minute=0)
@@ -1,8 +1,22 @@
 # Third-Party
 from decouple import config
 
+# Python
+import os
+
 # JWT
 JWT_KEY = config("JWT_KEY")
+REVOCATION_CAPACITY = config("REVOCATION_CAPACITY", default=100000, cast=int)
+REVOCATION_ERROR_RATE = config("REVOCATION_ERROR_RATE", default=0.001, cast=float)
+REVOCATION_REBUILD = config("REVOCATION_REBUILD", default=3600, cast=int)
+
+# Passwords
+PASSWORD_WORKERS = config("PASSWORD_WORKERS", default=4, cast=int)
+PASSWORD_MAX_PENDING = config("PASSWORD_MAX_PENDING", default=64, cast=int)
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=3, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=65536, cast=int)
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=4, cast=int)
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", default=12, cast=int)
 
 # Postgres
 DB_NAME = config("DB_NAME")
@@ -12,8 +26,32 @@ DB_HOST = config("DB_HOST")
 DB_PORT = config("DB_PORT")
 DB_URL = f"postgresql+psycopg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Server
+WEB_WORKERS = config("WEB_WORKERS", default=os.cpu_count() or 1, cast=int)
+WEB_KEEPALIVE = config("WEB_KEEPALIVE", default=5, cast=int)
+WEB_BACKLOG = config("WEB_BACKLOG", default=2048, cast=int)
+WEB_GRACEFUL_TIMEOUT = config("WEB_GRACEFUL_TIMEOUT", default=30, cast=int)
+WEB_RELOAD = config("WEB_RELOAD", default=False, cast=bool)
+
 # Local
 VOLUME = "./volume/"
+IMAGE_WORKERS = config("IMAGE_WORKERS", default=2, cast=int)
+MAX_UPLOAD_SIZE = config("MAX_UPLOAD_SIZE", default=10 * 1024 * 1024, cast=int)
+
+# Redis
+REDIS_URL = config("REDIS_URL", default="redis://127.0.0.1:6379/7")
+# Per process, two connections are held by the pub/sub listeners.
+REDIS_POOL_SIZE = config("REDIS_POOL_SIZE", default=50, cast=int)
+REDIS_POOL_TIMEOUT = config("REDIS_POOL_TIMEOUT", default=2, cast=float)
+CACHE_TTL = config("CACHE_TTL", default=60, cast=int)
+CACHE_STALE_TTL = config("CACHE_STALE_TTL", default=30, cast=int)
+ENTITY_CACHE_TTL = config("ENTITY_CACHE_TTL", default=300, cast=int)
+ENTITY_CACHE_LOCAL_TTL = config("ENTITY_CACHE_LOCAL_TTL", default=30, cast=int)
+ENTITY_CACHE_SIZE = config("ENTITY_CACHE_SIZE", default=10000, cast=int)
 
 # Celery
 CELERY_BROKER_URL = config("CELERY_BROKER_URL")
+EXPIRY_POLL_SECONDS = config("EXPIRY_POLL_SECONDS", default=5, cast=float)
+EXPIRY_BATCH_SIZE = config("EXPIRY_BATCH_SIZE", default=500, cast=int)
+AVATAR_GC_BATCH_SIZE = config("AVATAR_GC_BATCH_SIZE", default=500, cast=int)
+AVATAR_GC_GRACE = config("AVATAR_GC_GRACE", default=3600, cast=int)
@@ -0,0 +1,53 @@
+# Third-Party
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.exc import OperationalError
+
+# Python
+import os
+
+
+# Database tests migrate, truncate and fill the database they run on, so
+# they only run when TEST_DB_NAME names one set aside for them. Settings
+# read DB_NAME on import, which is why it is replaced here, before any
+# test module imports them.
+TEST_DB_NAME = os.environ.get("TEST_DB_NAME")
+if TEST_DB_NAME:
+    os.environ["DB_NAME"] = TEST_DB_NAME
+
+
+@pytest.fixture(scope="session")
+def database() -> None:
+    """Test database migrated to head, skips the test without one."""
+    if not TEST_DB_NAME:
+        pytest.skip("TEST_DB_NAME is not set")
+    try:
+        command.upgrade(Config("alembic.ini"), "head")
+    except OperationalError as e:
+        pytest.skip(f"Database is not reachable: {e}")
+
+
+@pytest.fixture
+def uncached(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Build every listing from Postgres, whatever Redis holds."""
+    from src.apps.utils.cache import listing_cache
+    from src.apps.utils.versions import catalog_versions
+
+    async def fetch(namespace, params, kinds, loader, conn):
+        key = listing_cache.make_key(namespace=namespace, params=params)
+        body = await listing_cache._load(
+            key=key, loader=loader, conn=conn, started=None, version=None
+        )
+        return body, None
+
+    async def read(kinds):
+        return None
+
+    monkeypatch.setattr(listing_cache, "fetch", fetch)
+    monkeypatch.setattr(catalog_versions, "read", read)
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
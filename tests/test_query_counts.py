@@ -0,0 +1,129 @@
+# Third-Party
+import httpx
+import pytest
+from sqlalchemy import event, insert, text
+
+# Python
+import asyncio
+from datetime import date, timedelta
+
+# Local
+from src.settings.base import engine, session
+from src.settings.asgi import app
+from src.apps.models import (
+    Author, Book, BookGenre, BookReservation, Genre, User,
+)
+from src.apps.utils.pagination import PAGE_SIZE
+
+
+pytestmark = pytest.mark.anyio
+
+BOOKS = PAGE_SIZE * 3
+TABLES = "reserv, books_genres, books, authors, genres, \"user\""
+
+
+async def _seed() -> None:
+    async with session() as conn:
+        await conn.execute(text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE"))
+        await conn.execute(insert(Genre), [
+            {"title": f"Genre {i}"} for i in range(5)
+        ])
+        await conn.execute(insert(Author), [
+            {"first_name": f"First {i}", "last_name": f"Last {i}"}
+            for i in range(10)
+        ])
+        await conn.execute(insert(Book), [
+            {
+                "title": f"Book {i}", "price": i, "pages": 100 + i,
+                "author_id": i % 10 + 1, "genre_id": i % 5 + 1
+            }
+            for i in range(BOOKS)
+        ])
+        await conn.execute(insert(BookGenre), [
+            {"book_id": i + 1, "genre_id": genre_id + 1}
+            for i in range(BOOKS)
+            for genre_id in {i % 5, (i + 1) % 5}
+        ])
+        await conn.execute(insert(User), [
+            {
+                "email": f"user{i}@example.com", "hashed_password": "-",
+                "first_name": f"First {i}", "last_name": f"Last {i}",
+                "avatar": ""
+            }
+            for i in range(BOOKS)
+        ])
+        today = date.today()
+        await conn.execute(insert(BookReservation), [
+            {
+                "user_id": i + 1, "book_id": i + 1, "begin_date": today,
+                "end_date": today + timedelta(days=7), "on_hands": True,
+                "is_returned": False
+            }
+            for i in range(BOOKS)
+        ])
+        await conn.commit()
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def catalog(database) -> None:
+    asyncio.run(_seed())
+
+
+@pytest.fixture
+async def queries(catalog, uncached):
+    """Statements run and rows they returned during a test."""
+    counts = {"statements": 0, "rows": 0}
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        if cursor.description is not None:
+            counts["rows"] += cursor.rowcount
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before)
+    event.listen(engine.sync_engine, "after_cursor_execute", after)
+    yield counts
+    event.remove(engine.sync_engine, "before_cursor_execute", before)
+    event.remove(engine.sync_engine, "after_cursor_execute", after)
+    await engine.dispose()
+
+
+async def _get(url: str, **params) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        response = await client.get(url, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.parametrize("url, params, expected", [
+    ("/api/v1/books", {}, PAGE_SIZE),
+    ("/api/v1/books", {"sort_by_price": "desc"}, PAGE_SIZE),
+    ("/api/v1/books", {"genre_ids": [1, 2], "genre_match": "all"}, 30),
+    ("/api/v1/books", {"author_ids": [3], "min_price": 10}, 14),
+    ("/api/v1/books/search", {"q": "Last 7"}, PAGE_SIZE),
+    ("/api/v1/books/batch", {"ids": [1, 2, 3, BOOKS + 1]}, 3),
+    ("/api/v1/authors", {}, 10),
+    ("/api/v1/genres", {}, 5),
+    ("/api/v1/reserv", {}, PAGE_SIZE),
+    ("/auth/users/", {}, PAGE_SIZE),
+])
+async def test_listing_is_one_bounded_query(queries, url, params, expected):
+    body = await _get(url, **params)
+    assert len(body["response"]) == expected
+    assert queries["statements"] == 1
+    assert queries["rows"] == expected
+
+
+async def test_next_page_is_one_bounded_query(queries):
+    first = await _get("/api/v1/books")
+    queries.update(statements=0, rows=0)
+    second = await _get(
+        "/api/v1/books", cursor=first["next_cursor"]
+    )
+    assert second["response"][0]["id"] == PAGE_SIZE + 1
+    assert queries == {"statements": 1, "rows": PAGE_SIZE}
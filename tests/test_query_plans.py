@@ -0,0 +1,96 @@
+# Third-Party
+import httpx
+import pytest
+from sqlalchemy import event, insert, text
+
+# Python
+import asyncio
+import json
+
+# Local
+from src.settings.base import engine, session
+from src.settings.asgi import app
+from src.apps.models import Author, Book, BookGenre, Genre
+
+
+pytestmark = pytest.mark.anyio
+
+BOOKS = 5000
+# Every book has one of genres 1-5, genre 6 is on a handful, like a
+# niche genre in a large catalog.
+RARE = 6
+TABLES = "reserv, books_genres, books, authors, genres, \"user\""
+
+
+async def _seed() -> None:
+    async with session() as conn:
+        await conn.execute(text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE"))
+        await conn.execute(insert(Genre), [
+            {"title": f"Genre {i}"} for i in range(1, RARE + 1)
+        ])
+        await conn.execute(insert(Author), [
+            {"first_name": f"First {i}", "last_name": f"Last {i}"}
+            for i in range(100)
+        ])
+        await conn.execute(insert(Book), [
+            {
+                "title": f"Book {i}", "price": i % 1000, "pages": 100,
+                "author_id": i % 100 + 1, "genre_id": i % 5 + 1
+            }
+            for i in range(BOOKS)
+        ])
+        await conn.execute(insert(BookGenre), [
+            {"book_id": i + 1, "genre_id": i % 5 + 1} for i in range(BOOKS)
+        ] + [
+            {"book_id": i + 1, "genre_id": RARE} for i in range(0, BOOKS, 1000)
+        ])
+        await conn.commit()
+        await conn.execute(text("ANALYZE book_listing"))
+    await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def catalog(database) -> None:
+    asyncio.run(_seed())
+
+
+@pytest.fixture
+async def plan(catalog, uncached):
+    """EXPLAIN of the statement a listing request runs."""
+    executed = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    async def explain(url: str, **params) -> str:
+        event.listen(engine.sync_engine, "before_cursor_execute", before)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                response = await client.get(url, params=params)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before)
+        assert response.status_code == 200, response.text
+        assert len(executed) == 1
+        statement, parameters = executed.pop()
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            return json.dumps(result.scalar())
+
+    yield explain
+    await engine.dispose()
+
+
+@pytest.mark.parametrize("params", [
+    {"genre_id": RARE},
+    {"genre_ids": [RARE, 1], "genre_match": "all"},
+    {"genre_ids": [RARE], "sort_by_price": "asc"},
+])
+async def test_genre_filter_uses_index(plan, params):
+    explained = await plan("/api/v1/books", **params)
+    assert "ix_book_listing_genre_ids" in explained
+    assert "Seq Scan" not in explained
@@ -0,0 +1,79 @@
+# Third-Party
+import httpx
+import pytest
+from sqlalchemy import func, insert, select, text
+
+# Python
+import asyncio
+from datetime import date, timedelta
+
+# Local
+from src.settings.base import engine, session
+from src.settings.asgi import app
+from src.apps.models import (
+    Author, Book, BookGenre, BookReservation, Genre, User,
+)
+from src.apps.utils.jwt_backend import current_user
+
+
+pytestmark = pytest.mark.anyio
+
+REQUESTS = 10
+TABLES = "reserv, books_genres, books, authors, genres, \"user\""
+
+
+async def _seed() -> None:
+    async with session() as conn:
+        await conn.execute(text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE"))
+        await conn.execute(insert(Genre).values(title="Genre"))
+        await conn.execute(insert(Author).values(first_name="A", last_name="B"))
+        await conn.execute(insert(Book).values(
+            title="Book", price=1, pages=1, author_id=1, genre_id=1
+        ))
+        await conn.execute(insert(BookGenre).values(book_id=1, genre_id=1))
+        await conn.execute(insert(User), [
+            {
+                "email": f"user{i}@example.com", "hashed_password": "-",
+                "first_name": "First", "last_name": "Last", "avatar": ""
+            }
+            for i in range(REQUESTS)
+        ])
+        await conn.commit()
+
+
+@pytest.fixture
+async def users(database):
+    """Users to reserve as, each request is authenticated as the next."""
+    await _seed()
+    async with session() as conn:
+        found = list((await conn.execute(select(User))).scalars().all())
+    queue = iter(found)
+    app.dependency_overrides[current_user] = lambda: next(queue)
+    yield found
+    app.dependency_overrides.pop(current_user, None)
+    await engine.dispose()
+
+
+async def test_overlapping_reservations_book_once(users):
+    # Every range contains the same day, so any two of them overlap.
+    day = date.today() + timedelta(days=30)
+    bodies = [
+        {
+            "book_id": 1, "begin_date": str(day - timedelta(days=i)),
+            "end_date": str(day + timedelta(days=i))
+        }
+        for i in range(REQUESTS)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        responses = await asyncio.gather(*(
+            client.post("/api/v1/reserv", json=body) for body in bodies
+        ))
+
+    codes = sorted(response.status_code for response in responses)
+    assert codes == [200] + [409] * (REQUESTS - 1)
+    async with session() as conn:
+        count = await conn.scalar(select(func.count(BookReservation.id)))
+    assert count == 1